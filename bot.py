@@ -1,11 +1,21 @@
-from telegram.ext import Application, CommandHandler, MessageHandler, filters
+import logging
+from telegram.ext import (
+    Application,
+    CommandHandler,
+    CallbackQueryHandler,
+    MessageHandler,
+    filters,
+)
 from telegram.ext import JobQueue
 from telegram import BotCommand
 from commands import (
     search,
+    search_movies,
+    search_tv,
     handle_reply,
     imdb,
     add_torrent,
+    upload_torrent,
     list_torrents,
     delete_torrent,
     start_torrent,
@@ -16,8 +26,38 @@ from commands import (
     help_command,
     torrent_manager,
     info_torrent,
+    info_details,
+    watch,
+    list_watches,
+    unwatch,
+    feed_watcher,
+    finalize_torrent,
+    dashboard,
+    indexers,
+    loop_stats,
+    memory,
+    loop_watchdog,
+    monitor,
+)
+from completion_listener import CompletionListener, completion_listener_enabled
+from jackett import probe_indexers
+from feed_watcher import WATCH_SYNC_INTERVAL
+from logging_setup import setup_logging
+from config import (
+    TELEGRAM_TOKEN,
+    ADAPTIVE_INDEXERS,
+    INDEXER_PROBE_INTERVAL,
+    LOOP_WATCHDOG,
+    LEADER_CHECK_INTERVAL,
+    WEBHOOK_URL,
+    WEBHOOK_LISTEN,
+    WEBHOOK_PORT,
+    WEBHOOK_SECRET,
 )
-from config import TELEGRAM_TOKEN
+
+logger = logging.getLogger(__name__)
+
+completion_listener = None
 
 
 async def set_commands(app: Application):
@@ -36,11 +76,16 @@ async def set_commands(app: Application):
             command="search",
             description="Search for a movie or TV show (e.g., 'The Matrix' or 'Simpsons s01e01')",
         ),
+        BotCommand(command="searchmovie", description="Search only movies"),
+        BotCommand(command="searchtv", description="Search only TV shows"),
         BotCommand(
             command="imdb",
             description="Get information from an IMDb link and search it",
         ),
-        BotCommand(command="torrent", description="Add a torrent using a magnet link."),
+        BotCommand(
+            command="torrent",
+            description="Add torrents using magnet links or .torrent URLs.",
+        ),
         BotCommand(command="ls", description="Same as /list"),
         BotCommand(command="h", description="To see all commands"),
         BotCommand(command="info", description="Get information about a torrent"),
@@ -48,6 +93,22 @@ async def set_commands(app: Application):
             command="forcestart", description="Force start a torrent using its id."
         ),
         BotCommand(command="fs", description="Same as /forcestart"),
+        BotCommand(
+            command="dashboard",
+            description="Track all torrents in one pinned message. Use /dashboard off to stop.",
+        ),
+        BotCommand(
+            command="watch",
+            description="Watch for new results of a search. Use -a to add them.",
+        ),
+        BotCommand(command="watches", description="List this chat's watches"),
+        BotCommand(command="unwatch", description="Delete a watch using its id."),
+        BotCommand(command="indexers", description="Show Jackett indexer statistics"),
+        BotCommand(command="loopstats", description="Show event loop stalls"),
+        BotCommand(
+            command="memory",
+            description="Report memory use. Use /memory on to trace allocations.",
+        ),
     ]
     await app.bot.set_my_commands(commands)
 
@@ -62,17 +123,74 @@ async def post_init(app: Application):
         # Establish connection to Transmission before accepting commands
         await torrent_manager.ensure_connected()
     except Exception as e:
-        print(f"Error initializing torrent manager: {e}")
+        logger.error("Error initializing torrent manager: %s", e)
         # We'll let the application continue, and retry connections later
 
+    # Take part in the monitor leader election, taking over if the leader dies
+    if monitor.election is not None:
+        app.job_queue.run_repeating(
+            monitor.elect, interval=LEADER_CHECK_INTERVAL, first=0, name="elect"
+        )
+
+    # Poll the feeds of saved watches; replicas keep syncing, since only the
+    # monitor leader polls and watches can be added on any of them
+    if feed_watcher is not None:
+        if monitor.election is not None:
+            app.job_queue.run_repeating(
+                feed_watcher.sync,
+                interval=WATCH_SYNC_INTERVAL,
+                first=0,
+                name="watch_sync",
+            )
+        else:
+            app.job_queue.run_once(feed_watcher.sync, 0, name="watch_sync")
+
+    # Catch handlers that block the event loop
+    if LOOP_WATCHDOG:
+        loop_watchdog.start()
+
+    # Probe the indexers adaptive mode leaves out until they recover; the first
+    # run right away lists the configured indexers
+    if ADAPTIVE_INDEXERS:
+        app.job_queue.run_repeating(
+            probe_indexers,
+            interval=INDEXER_PROBE_INTERVAL,
+            first=0,
+            name="probe_indexers",
+        )
+
+    # Receive completion events pushed by Transmission
+    if completion_listener_enabled():
+        global completion_listener
+        completion_listener = CompletionListener(
+            lambda torrent_id, infohash: finalize_torrent(app, torrent_id, infohash)
+        )
+        try:
+            await completion_listener.start()
+        except OSError as e:
+            logger.error("Error starting completion listener: %s", e)
+            completion_listener = None
+
+
+async def post_shutdown(app: Application):
+    """Run shutdown tasks."""
+    await loop_watchdog.stop()
+    if monitor.election is not None:
+        monitor.election.resign()
+    if completion_listener is not None:
+        await completion_listener.stop()
+
 
 def main():
     """Start the bot."""
+    setup_logging()
+
     # Set up the Application with concurrency settings, proper timeouts, and job queue
     application = (
         Application.builder()
         .token(TELEGRAM_TOKEN)
         .post_init(post_init)
+        .post_shutdown(post_shutdown)
         .concurrent_updates(True)  # Enable concurrent updates
         .connection_pool_size(16)  # Increase connection pool size
         .get_updates_read_timeout(30.0)
@@ -86,6 +204,10 @@ def main():
     # Search for torrents
     application.add_handler(CommandHandler("search", search))
     application.add_handler(CommandHandler("s", search))
+    application.add_handler(CommandHandler("searchmovie", search_movies))
+    application.add_handler(CommandHandler("sm", search_movies))
+    application.add_handler(CommandHandler("searchtv", search_tv))
+    application.add_handler(CommandHandler("st", search_tv))
     # Fetch IMDB link info and search for torrents
     application.add_handler(CommandHandler("imdb", imdb))
     # Add torrents using magnet links or torrent files
@@ -103,6 +225,15 @@ def main():
     # Delete torrents
     application.add_handler(CommandHandler("delete", delete_torrent))
     application.add_handler(CommandHandler("del", delete_torrent))
+    # Add uploaded .torrent files; registered before replies so a reply
+    # carrying a file is taken as an upload
+    application.add_handler(
+        MessageHandler(
+            filters.Document.FileExtension("torrent")
+            | filters.Document.MimeType("application/x-bittorrent"),
+            upload_torrent,
+        )
+    )
     # Handle replies to search results
     application.add_handler(MessageHandler(filters.REPLY, handle_reply))
     # Move torrents to directories
@@ -116,19 +247,43 @@ def main():
     # Torrent info command
     application.add_handler(CommandHandler("info", info_torrent))
     application.add_handler(CommandHandler("i", info_torrent))
+    application.add_handler(CallbackQueryHandler(info_details, pattern=r"^info:"))
+    # Watches of new search results
+    application.add_handler(CommandHandler("watch", watch))
+    application.add_handler(CommandHandler("watches", list_watches))
+    application.add_handler(CommandHandler("unwatch", unwatch))
+    # Pinned dashboard of tracked torrents
+    application.add_handler(CommandHandler("dashboard", dashboard))
+    # Admin commands
+    application.add_handler(CommandHandler("indexers", indexers))
+    application.add_handler(CommandHandler("loopstats", loop_stats))
+    application.add_handler(CommandHandler("memory", memory))
 
     # Add error handler
     application.add_error_handler(error_handler)
 
-    # Run the bot with polling
-    application.run_polling(allowed_updates=["message", "callback_query"])
+    if WEBHOOK_URL:
+        # Let Telegram spread updates over the replicas behind WEBHOOK_URL
+        application.run_webhook(
+            listen=WEBHOOK_LISTEN,
+            port=WEBHOOK_PORT,
+            webhook_url=WEBHOOK_URL,
+            secret_token=WEBHOOK_SECRET,
+            allowed_updates=["message", "callback_query"],
+        )
+    else:
+        # Run the bot with polling
+        application.run_polling(allowed_updates=["message", "callback_query"])
 
 
 async def error_handler(update, context):
     """Handle errors."""
-    print(f"An error occurred: {context.error}")
-    # Log the error before we do anything else
-    print(f"Update {update} caused error {context.error}")
+    logger.error(
+        "Update %s caused error %s",
+        update,
+        context.error,
+        exc_info=context.error,
+    )
 
 
 if __name__ == "__main__":
@@ -1,19 +1,96 @@
+import html
 import time
 import asyncio
-import traceback
-from telegram import Update
+import logging
+from telegram import Update, LinkPreviewOptions
 from telegram.ext import CallbackContext
 from telegram.error import BadRequest
-from config import DATA_DIR, MOVIES_DIR, TV_DIR, AUTHORIZED_USERS
-from torrent_manager import TorrentManager
-from jackett import request_jackett, get_torrent_link, download_torrent_file
-from imdb import get_imdb_info
-from message_formatting import format_torrent_message, format_torrent_list
+from config import (
+    DATA_DIR,
+    MOVIES_DIR,
+    TV_DIR,
+    AUTHORIZED_USERS,
+    ADMIN_USERS,
+    ADAPTIVE_INDEXERS,
+    LOOP_WATCHDOG,
+    SHARED_STORE,
+    ADD_CONCURRENCY,
+    MAX_TORRENT_FILE_SIZE,
+    WATCH_DB,
+)
+from torrent_manager import TorrentManager, executors
+from move_tracker import MoveTracker
+from monitor import TorrentMonitor
+from result_store import ResultStore
+from loop_watchdog import LoopWatchdog
+from memory_report import MemoryProfiler, format_structure_sizes
+from shared_store import open_shared_store
+from feed_watcher import FeedWatcher, WatchStore
+from jackett import (
+    request_jackett,
+    get_torrent_link,
+    download_torrent_file,
+    indexer_stats,
+    get_categories,
+    merge_search_results,
+    format_results_table,
+    result_index,
+    inflight_searches,
+)
+from imdb import get_imdb_info, extract_imdb_id, OMDB_TYPE_CATEGORIES, omdb_cache
+from metainfo import parse_torrent_metainfo, magnet_infohash, magnet_name
+from message_formatting import (
+    format_torrent_message,
+    format_torrent_list,
+    format_metainfo_summary,
+    format_dashboard,
+    format_added_torrent,
+    format_file_list,
+    format_peer_list,
+    format_tracker_list,
+    info_keyboard,
+)
+
+logger = logging.getLogger(__name__)
 
 # Global variables
 torrent_manager = TorrentManager()
-torrent_messages = {}
-torrent_last_progress = {}
+move_tracker = MoveTracker(torrent_manager)
+chat_searches = {}  # Maps chat_id -> task of the chat's in-flight search
+add_limiter = asyncio.Semaphore(ADD_CONCURRENCY)  # Shared by all chats and watches
+pending_albums = {}  # Maps (chat_id, media_group_id) -> updates of the album's files
+
+# Seconds to wait for the rest of an album of .torrent files
+ALBUM_COLLECT_DELAY = 1.0
+
+# New watch results listed per message; replies pick by index within one message
+WATCH_RESULTS_PER_MESSAGE = 10
+# Messages sent per poll of a watch at most; further results are only counted
+WATCH_MAX_MESSAGES = 3
+
+if WATCH_DB:
+    # Only the monitor leader polls feeds, so replicas don't report twice
+    feed_watcher = FeedWatcher(
+        WatchStore(WATCH_DB),
+        lambda context, watch, items: notify_watch_matches(context, watch, items),
+        is_active=lambda: monitor.leader,
+    )
+else:
+    feed_watcher = None
+if SHARED_STORE:
+    # Replicas share subscriptions and search results, and elect a monitor leader
+    shared_store = open_shared_store(SHARED_STORE)
+    result_store = shared_store.results
+    monitor = TorrentMonitor(
+        torrent_manager,
+        registry=shared_store.registry,
+        election=shared_store.election,
+    )
+else:
+    result_store = ResultStore()
+    monitor = TorrentMonitor(torrent_manager)
+loop_watchdog = LoopWatchdog()
+memory_profiler = MemoryProfiler()
 
 
 # Authentication decorator
@@ -25,130 +102,215 @@ def authorized_only(func):
         if not AUTHORIZED_USERS or user_id in AUTHORIZED_USERS:
             return await func(update, context)
         else:
-            await update.message.reply_text("You are not authorized to use this bot.")
+            await update.effective_message.reply_text(
+                "You are not authorized to use this bot."
+            )
 
     return wrapper
 
 
-# Torrent progress tracking
-async def update_torrent_progress(chat_id, torrent_id, context: CallbackContext):
-    """Update the progress of a specific torrent."""
-    try:
-        torrent = await torrent_manager.get_torrent(torrent_id)
-        progress = torrent.percent_done * 100
-
-        # Check if progress has changed since last update
-        if (
-            torrent_id in torrent_last_progress
-            and torrent_last_progress[torrent_id] == progress
-        ):
-            return  # Skip updating if progress hasn't changed
+def admin_only(func):
+    """Decorator to check if user is allowed to run admin commands."""
 
-        free_space = await torrent_manager.get_free_space(DATA_DIR)
-        message_text = format_torrent_message(torrent, free_space)
-
-        if torrent_id in torrent_messages and chat_id in torrent_messages[torrent_id]:
-            message_id = torrent_messages[torrent_id][chat_id]
-            try:
-                await context.bot.edit_message_text(
-                    chat_id=chat_id, message_id=message_id, text=message_text
-                )
-            except BadRequest as e:
-                if "Message is not modified" not in str(e):
-                    raise
+    async def wrapper(update: Update, context: CallbackContext):
+        user_id = update.effective_user.id
+        if not ADMIN_USERS or user_id in ADMIN_USERS:
+            return await func(update, context)
         else:
-            sent_message = await context.bot.send_message(
-                chat_id=chat_id, text=message_text
+            await update.effective_message.reply_text(
+                "This command is for admins only."
             )
-            if torrent_id not in torrent_messages:
-                torrent_messages[torrent_id] = {}
-            torrent_messages[torrent_id][chat_id] = sent_message.message_id
-
-        # Update the last known progress
-        torrent_last_progress[torrent_id] = progress
-
-        # Check if the torrent is complete
-        if progress >= 100:
-            # Remove the torrent from tracking
-            if (
-                torrent_id in torrent_messages
-                and chat_id in torrent_messages[torrent_id]
-            ):
-                del torrent_messages[torrent_id][chat_id]
-            if torrent_id in torrent_last_progress:
-                del torrent_last_progress[torrent_id]
-            # Stop the job
-            jobs = context.job_queue.get_jobs_by_name(str(torrent_id))
-            if jobs:
-                jobs[0].schedule_removal()
-            return
-    except BadRequest as e:
-        if "Message is not modified" in str(e):
-            pass  # Ignore the error if the message content hasn't changed
-        else:
-            raise  # Re-raise the exception if it's not the specific "Message is not modified" error
-    except Exception as e:
-        print(f"Error updating torrent progress: {e}")
-        if torrent_id in torrent_messages and chat_id in torrent_messages[torrent_id]:
-            message_id = torrent_messages[torrent_id][chat_id]
-            try:
-                await context.bot.delete_message(chat_id=chat_id, message_id=message_id)
-            except:
-                pass
-            del torrent_messages[torrent_id][chat_id]
-        if torrent_id in torrent_last_progress:
-            del torrent_last_progress[torrent_id]
+
+    return wrapper
+
+
+async def track_existing_torrent(update: Update, context: CallbackContext, infohash):
+    """Attach the chat to tracking of a torrent that is already in Transmission.
+
+    Returns True if the infohash was found and no add is needed.
+    """
+    if not infohash:
+        return False
+    torrent = await torrent_manager.find_torrent(infohash)
+    if torrent is None:
+        return False
+    torrent_id = torrent.id
+
+    chat_id = update.effective_chat.id
+    free_space = await torrent_manager.get_free_space(DATA_DIR)
+    message_text = "Torrent is already in Transmission.\n" + format_torrent_message(
+        torrent, free_space
+    )
+    sent_message = await update.message.reply_text(message_text)
+
+    # Only track it if there is still progress to report
+    if torrent.percent_done < 1:
+        await monitor.track(
+            context.job_queue,
+            chat_id,
+            torrent_id,
+            sent_message.message_id,
+            message_text,
+            torrent.percent_done * 100,
+        )
+    return True
+
+
+async def run_chat_search(chat_id, status_message, search):
+    """Run a chat's search, cancelling the chat's previous in-flight search.
+
+    search is called with an on_queued callback for request_jackett and
+    returns the search coroutine. Returns None if this search was itself
+    superseded by a newer one.
+    """
+
+    async def on_queued(ahead):
         try:
-            jobs = context.job_queue.get_jobs_by_name(str(torrent_id))
-            if jobs:
-                jobs[0].schedule_removal()
-        except:
+            await status_message.edit_text(
+                f"{status_message.text}\n(queued, {ahead} ahead)"
+            )
+        except BadRequest:
             pass
 
+    previous = chat_searches.get(chat_id)
+    if previous is not None:
+        previous.cancel()
+    task = asyncio.ensure_future(search(on_queued))
+    chat_searches[chat_id] = task
+    try:
+        return await task
+    except asyncio.CancelledError:
+        # Only swallow the cancellation if a newer search took this one's place;
+        # otherwise the caller itself was cancelled
+        if chat_searches.get(chat_id) is task:
+            raise
+        return None
+    finally:
+        if chat_searches.get(chat_id) is task:
+            del chat_searches[chat_id]
+
 
 # Command handlers
-@authorized_only
-async def search(update: Update, context: CallbackContext):
-    """Search for torrents using Jackett."""
+async def search_jackett(update: Update, context: CallbackContext, query, categories):
+    """Search Jackett for a command and reply with the results table."""
     try:
-        if len(context.args) > 0:
-            query = " ".join(context.args)
+        # Answer at once from results seen in earlier searches, if any
+        cached_results = None
+        if result_index is not None:
+            try:
+                cached_results = await result_index.lookup(query, categories)
+            except Exception as e:
+                logger.warning("Error looking up indexed results: %s", e)
+
+        if cached_results:
+            search_message = await update.message.reply_text(
+                f"<i>Earlier results, refreshing...</i>\n"
+                f"<pre>{format_results_table(cached_results)}</pre>",
+                parse_mode="HTML",
+                quote=False,
+            )
+            # Replies to the stale results work while the fresh ones load
+            await result_store.put(
+                update.effective_chat.id, search_message.message_id, cached_results
+            )
+        else:
             # Send the "Searching for torrents..." message
             search_message = await update.message.reply_text(
                 f"Searching for torrents... {query}", parse_mode="HTML", quote=False
             )
 
-            formatted_results, results = await request_jackett(query)
-            if not formatted_results:
-                response_message = "`No results found.`"
-            else:
-                response_message = formatted_results
-                response_message += "\n\nReply to this message with the index of the torrent you want to download."
-                response_message = f"\n<pre>{response_message}</pre>"
-
-            try:
-                # Edit the message with the search results
-                await search_message.edit_text(response_message, parse_mode="HTML")
-            except BadRequest as e:
-                print(f"Error editing message: {e}")
-                await update.message.reply_text(
-                    "An error occurred while formatting the message. Please try again later.",
-                    quote=False,
+        outcome = await run_chat_search(
+            update.effective_chat.id,
+            search_message,
+            # Don't overwrite stale results with the queue position
+            lambda on_queued: request_jackett(
+                query, None if cached_results else on_queued, categories
+            ),
+        )
+        if outcome is None:
+            if not cached_results:
+                await search_message.edit_text(
+                    f"Search for {query} was replaced by a newer search."
                 )
-
-            context.chat_data["results"] = results  # Store results in chat data
+                return
+            outcome = ("replaced by a newer search", None)
+        formatted_results, results = outcome
+        if results is None and cached_results:
+            # Keep showing the stale results rather than just the error
+            formatted_results = f"{format_results_table(cached_results)}\n\n(Not refreshed: {formatted_results})"
+            results = cached_results
+        if not formatted_results:
+            response_message = "`No results found.`"
         else:
-            await update.message.reply_text("Usage: /search <query>")
+            response_message = formatted_results
+            response_message += "\n\nReply to this message with the index of the torrent you want to download."
+            response_message = f"\n<pre>{response_message}</pre>"
+
+        try:
+            # Edit the message with the search results
+            await search_message.edit_text(response_message, parse_mode="HTML")
+        except BadRequest as e:
+            logger.warning("Error editing message: %s", e)
+            await update.message.reply_text(
+                "An error occurred while formatting the message. Please try again later.",
+                quote=False,
+            )
+
+        # Store the results under the message that shows them
+        if results:
+            await result_store.put(
+                update.effective_chat.id, search_message.message_id, results
+            )
     except Exception as e:
-        print(f"An error occurred in search command: {e}")
+        logger.exception("An error occurred in search command: %s", e)
         await update.message.reply_text("Something went wrong. Please try again later.")
 
 
+@authorized_only
+async def search(update: Update, context: CallbackContext):
+    """Search for torrents using Jackett, optionally within a category."""
+    try:
+        _, categories, args = parse_search_flags(context.args, set())
+    except ValueError as e:
+        await update.message.reply_text(str(e))
+        return
+
+    if len(args) > 0:
+        await search_jackett(update, context, " ".join(args), categories)
+    else:
+        await update.message.reply_text("Usage: /search [-c category] <query>")
+
+
+@authorized_only
+async def search_movies(update: Update, context: CallbackContext):
+    """Search for movies using Jackett."""
+    if len(context.args) > 0:
+        await search_jackett(
+            update, context, " ".join(context.args), get_categories("movie")
+        )
+    else:
+        await update.message.reply_text("Usage: /searchmovie <query>")
+
+
+@authorized_only
+async def search_tv(update: Update, context: CallbackContext):
+    """Search for TV shows using Jackett."""
+    if len(context.args) > 0:
+        await search_jackett(
+            update, context, " ".join(context.args), get_categories("tv")
+        )
+    else:
+        await update.message.reply_text("Usage: /searchtv <query>")
+
+
 @authorized_only
 async def handle_reply(update: Update, context: CallbackContext):
     """Handle replies to search results."""
     user_reply = update.message.reply_to_message.text
-    if not user_reply or "results" not in context.chat_data:
+    results = await result_store.get(
+        update.effective_chat.id, update.message.reply_to_message.message_id
+    )
+    if not user_reply or results is None:
         await update.message.reply_text(
             "No search results found in context. Please start a new search.",
             quote=False,
@@ -158,17 +320,29 @@ async def handle_reply(update: Update, context: CallbackContext):
     # Extracting the selected index from the reply
     try:
         index = int(update.message.text.split(".")[0]) - 1
-        results = context.chat_data["results"]
         torrent_link = get_torrent_link(index, results)
 
         # Adding the torrent to Transmission
         try:
             if torrent_link.startswith("magnet:"):
+                if await track_existing_torrent(
+                    update, context, magnet_infohash(torrent_link)
+                ):
+                    return
                 added_torrent = await torrent_manager.add_torrent(torrent_link)
             else:
                 # Handle non-magnet links - download the torrent file first
                 try:
                     torrent_data = await download_torrent_file(torrent_link)
+                    # Validate and summarize the metainfo before handing it over
+                    metainfo = await parse_torrent_metainfo(torrent_data)
+                    await update.message.reply_text(
+                        format_metainfo_summary(metainfo), quote=False
+                    )
+                    if await track_existing_torrent(
+                        update, context, metainfo["infohash"]
+                    ):
+                        return
                     added_torrent = await torrent_manager.add_torrent(torrent_data)
                 except Exception as e:
                     # Try to extract magnet link from error
@@ -177,6 +351,10 @@ async def handle_reply(update: Update, context: CallbackContext):
                         magnet_link = (
                             "magnet:?" + error_str.split("magnet:?")[1].split(" ")[0]
                         )
+                        if await track_existing_torrent(
+                            update, context, magnet_infohash(magnet_link)
+                        ):
+                            return
                         added_torrent = await torrent_manager.add_torrent(magnet_link)
                     else:
                         raise
@@ -188,22 +366,12 @@ async def handle_reply(update: Update, context: CallbackContext):
                 f"Torrent added successfully to Transmission. - {torrent_name} (ID: {torrent_id})"
             )
 
-            await start_monitoring(context)
-
-            # Store the initial message ID
-            if torrent_id not in torrent_messages:
-                torrent_messages[torrent_id] = {}
-            torrent_messages[torrent_id][chat_id] = sent_message.message_id
-
-            # Start the repeating job
-            context.job_queue.run_repeating(
-                lambda c: update_torrent_progress(chat_id, torrent_id, c),
-                interval=5,
-                first=0,
-                name=str(torrent_id),
+            # Track the initial message; the monitor fills in progress
+            await monitor.track(
+                context.job_queue, chat_id, torrent_id, sent_message.message_id
             )
         except Exception as e:
-            print(traceback.format_exc())
+            logger.exception("Error adding torrent")
             await update.message.reply_text(f"Failed to add torrent: {str(e)}")
     except (IndexError, ValueError):
         await update.message.reply_text(
@@ -211,132 +379,47 @@ async def handle_reply(update: Update, context: CallbackContext):
         )
 
 
-torrent_messages = {}  # Maps torrent_id -> {chat_id -> message_id}
-torrent_last_progress = {}  # Maps torrent_id -> progress_percentage
-monitoring_active = False  # Flag to track if monitoring is currently running
+async def finalize_torrent(application, torrent_id, infohash=None):
+    """Finish tracking a torrent that Transmission reported as done."""
+    await monitor.finalize(application.bot, torrent_id, infohash)
 
 
-async def check_torrents(context: CallbackContext):
-    """
-    Periodically check and update the progress of all active torrents.
-    """
-    global monitoring_active
+async def search_imdb(imdb_id, link, status_message, on_queued):
+    """Search Jackett by IMDb ID while OMDB is looked up, then by title, and merge.
 
+    Returns the formatted results table and the merged results.
+    """
+    # Jackett treats a bare IMDb ID query as an ID search on indexers that support it
+    id_search = asyncio.ensure_future(request_jackett(imdb_id, on_queued))
     try:
-        # If no torrents are being tracked, stop the job
-        if not torrent_messages:
-            print("No torrents being tracked. Stopping monitoring job.")
-            monitoring_active = False
-
-            # Find and remove the check_torrents job
-            jobs = context.job_queue.get_jobs_by_name("check_torrents")
-            for job in jobs:
-                job.schedule_removal()
-            return
-
-        # Iterate through existing tracker messages
-        for torrent_id, chat_dict in list(torrent_messages.items()):
+        search_query, imdb_type = await get_imdb_info(link)
+        title_results = None
+        if imdb_type is not None:
             try:
-                # Get the torrent details
-                torrent = await torrent_manager.get_torrent(torrent_id)
-                progress = torrent.percent_done * 100
-
-                # Get current free space once per torrent to ensure consistency
-                free_space = await torrent_manager.get_free_space(DATA_DIR)
-
-                # Store previous progress to avoid unnecessary updates
-                previous_progress = torrent_last_progress.get(torrent_id, -1)
-
-                # Only update if progress has changed by at least 0.5%
-                if abs(progress - previous_progress) < 0.5:
-                    continue
-
-                # Update the progress tracking
-                torrent_last_progress[torrent_id] = progress
-
-                # Update each chat's message for this torrent
-                for chat_id, message_id in list(chat_dict.items()):
-                    try:
-                        # Generate updated message text
-                        message_text = format_torrent_message(torrent, free_space)
-
-                        # Update the message
-                        try:
-                            await context.bot.edit_message_text(
-                                chat_id=chat_id,
-                                message_id=message_id,
-                                text=message_text,
-                            )
-                        except BadRequest as e:
-                            # Ignore "message not modified" errors
-                            if "Message is not modified" not in str(e):
-                                raise
-
-                        # Remove tracking if download is complete
-                        if progress >= 100:
-                            print(
-                                f"Torrent {torrent_id} complete. Removing from tracking."
-                            )
-                            if chat_id in chat_dict:
-                                del chat_dict[chat_id]
-
-                            # If this chat_dict is now empty, remove the torrent entirely
-                            if not chat_dict and torrent_id in torrent_messages:
-                                del torrent_messages[torrent_id]
-
-                            if torrent_id in torrent_last_progress:
-                                del torrent_last_progress[torrent_id]
-
-                    except Exception as edit_error:
-                        print(
-                            f"Error updating message for torrent {torrent_id} in chat {chat_id}: {edit_error}"
-                        )
-                        # Clean up tracking if message update fails
-                        if chat_id in chat_dict:
-                            try:
-                                # Try to delete the message if we can't update it
-                                await context.bot.delete_message(
-                                    chat_id=chat_id, message_id=message_id
-                                )
-                            except Exception:
-                                pass  # Ignore errors when deleting
-                            del chat_dict[chat_id]
-
-                        # If this chat_dict is now empty, remove the torrent entirely
-                        if not chat_dict and torrent_id in torrent_messages:
-                            del torrent_messages[torrent_id]
-
-            except Exception as torrent_error:
-                print(f"Error getting torrent {torrent_id}: {torrent_error}")
-                # Remove tracking for this torrent if it can't be retrieved
-                if torrent_id in torrent_messages:
-                    del torrent_messages[torrent_id]
-                if torrent_id in torrent_last_progress:
-                    del torrent_last_progress[torrent_id]
-                # Delete the message if it exists
-                for chat_id, message_id in list(chat_dict.items()):
-                    try:
-                        await context.bot.delete_message(
-                            chat_id=chat_id, message_id=message_id
-                        )
-                    except Exception:
-                        pass
-
-    except Exception as global_error:
-        print(f"Error in check_torrents: {global_error}")
-        # Don't stop monitoring due to a transient error
+                await status_message.edit_text(f"Searching for: {search_query}")
+            except BadRequest:
+                pass
 
+            # Let Jackett filter by what OMDB says the title is
+            categories = (
+                get_categories(OMDB_TYPE_CATEGORIES[imdb_type])
+                if imdb_type in OMDB_TYPE_CATEGORIES
+                else None
+            )
+            title_error, title_results = await request_jackett(
+                search_query, on_queued, categories
+            )
+        else:
+            title_error = f"IMDb lookup failed: {search_query}"
 
-async def start_monitoring(context: CallbackContext):
-    """Start the torrent monitoring if it's not already running."""
-    global monitoring_active
+        id_error, id_results = await id_search
+    finally:
+        id_search.cancel()
 
-    if not monitoring_active and torrent_messages:
-        print("Starting torrent monitoring.")
-        monitoring_active = True
-        context.job_queue.run_repeating(
-            check_torrents, interval=5, first=0, name="check_torrents"
-        )
+    if title_results is None and id_results is None:
+        return (title_error, None)
+    results = merge_search_results(id_results, title_results)
+    return (format_results_table(results), results)
 
 
 @authorized_only
@@ -344,10 +427,24 @@ async def imdb(update: Update, context: CallbackContext):
     """Get movie info from IMDb and search for torrents."""
     if len(context.args) == 1:
         link = context.args[0]
-        search_query = await get_imdb_info(link)
-        await update.message.reply_text(f"Searching for: {search_query}")
+        try:
+            imdb_id = extract_imdb_id(link)
+        except ValueError as e:
+            await update.message.reply_text(str(e))
+            return
+        search_message = await update.message.reply_text(f"Looking up {imdb_id}...")
 
-        formatted_results, results = await request_jackett(search_query)
+        outcome = await run_chat_search(
+            update.effective_chat.id,
+            search_message,
+            lambda on_queued: search_imdb(imdb_id, link, search_message, on_queued),
+        )
+        if outcome is None:
+            await search_message.edit_text(
+                f"Search for {imdb_id} was replaced by a newer search."
+            )
+            return
+        formatted_results, results = outcome
         if not formatted_results:
             response_message = "`No results found.`"
             await update.message.reply_text(
@@ -357,67 +454,158 @@ async def imdb(update: Update, context: CallbackContext):
             response_message = formatted_results
             response_message += "\n\nReply to this message with the index of the torrent you want to download."
             response_message = f"```\n{response_message}```"
-            await update.message.reply_text(
+            results_message = await update.message.reply_text(
                 response_message, parse_mode="MarkdownV2", quote=False
             )
-            context.chat_data["results"] = results  # Store results in chat data
+            # Store the results under the message that shows them
+            if results:
+                await result_store.put(
+                    update.effective_chat.id, results_message.message_id, results
+                )
     else:
         await update.message.reply_text("Usage: /imdb <movie url>")
 
 
-@authorized_only
-async def add_torrent(update: Update, context: CallbackContext):
-    """Add a torrent using a magnet link or torrent URL."""
-    if len(context.args) == 1:
-        link = context.args[0]
-        if link.startswith("magnet:") or link.endswith(".torrent"):
-            try:
+async def add_link(update: Update, context: CallbackContext, link):
+    """Add one magnet link or .torrent URL and start tracking it.
+
+    Returns True if the torrent was added or already in Transmission.
+    """
+    metainfo = None
+    async with add_limiter:
+        try:
+            if link.startswith("magnet:"):
+                # The magnet itself names the torrent, so nothing needs fetching
+                infohash = magnet_infohash(link)
+                if await track_existing_torrent(update, context, infohash):
+                    return True
                 added_torrent = await torrent_manager.add_torrent(link)
-                torrent_id = added_torrent.id
-                chat_id = update.effective_chat.id
+                name = magnet_name(link) or added_torrent.name
+            else:
+                # Fetch the .torrent ourselves so bad files are rejected early
+                torrent_data = await download_torrent_file(link)
+                metainfo = await parse_torrent_metainfo(torrent_data)
+                infohash = metainfo["infohash"]
+                if await track_existing_torrent(update, context, infohash):
+                    return True
+                added_torrent = await torrent_manager.add_torrent(torrent_data)
+                name = metainfo["name"]
+        except Exception as e:
+            await update.message.reply_text(f"Failed to add {link[:60]}: {e}")
+            return False
+
+    await track_added_torrent(update, context, added_torrent, name, infohash, metainfo)
+    return True
 
-                # Send initial message
-                sent_message = await update.message.reply_text(
-                    "Torrent added successfully to Transmission."
+
+async def add_upload(update: Update, context: CallbackContext):
+    """Add the .torrent file attached to a message and start tracking it.
+
+    Returns True if the torrent was added or already in Transmission.
+    """
+    document = update.message.document
+    async with add_limiter:
+        try:
+            # Refuse oversized files before downloading them
+            if document.file_size and document.file_size > MAX_TORRENT_FILE_SIZE:
+                raise ValueError(
+                    f"Torrent file is too large ({document.file_size} bytes, limit is {MAX_TORRENT_FILE_SIZE})"
                 )
+            telegram_file = await document.get_file()
+            # Kept in memory; Transmission gets it as base64 metainfo in one request
+            torrent_data = bytes(await telegram_file.download_as_bytearray())
+            metainfo = await parse_torrent_metainfo(torrent_data)
+            infohash = metainfo["infohash"]
+            if await track_existing_torrent(update, context, infohash):
+                return True
+            added_torrent = await torrent_manager.add_torrent(torrent_data)
+        except Exception as e:
+            await update.message.reply_text(f"Failed to add {document.file_name}: {e}")
+            return False
+
+    await track_added_torrent(
+        update, context, added_torrent, metainfo["name"], infohash, metainfo
+    )
+    return True
+
+
+async def track_added_torrent(
+    update: Update,
+    context: CallbackContext,
+    added_torrent,
+    name,
+    infohash,
+    metainfo=None,
+):
+    """Reply about a newly added torrent and follow it in the monitor."""
+    torrent_id = added_torrent.id
+    message_text = format_added_torrent(
+        torrent_id, name, infohash or added_torrent.hash_string, metainfo
+    )
+    sent_message = await update.message.reply_text(message_text)
+
+    # The monitor fills in details and progress as Transmission learns them
+    await monitor.track(
+        context.job_queue,
+        update.effective_chat.id,
+        torrent_id,
+        sent_message.message_id,
+        message_text,
+    )
 
-                # Give Transmission a moment to start processing
-                await asyncio.sleep(1)
 
-                # Get the torrent details and update the message
-                torrent = await torrent_manager.get_torrent(torrent_id)
-                free_space = await torrent_manager.get_free_space(DATA_DIR)
-                message_text = format_torrent_message(torrent, free_space)
+@authorized_only
+async def add_torrent(update: Update, context: CallbackContext):
+    """Add torrents using magnet links or torrent URLs."""
+    if not context.args:
+        await update.message.reply_text(
+            "Usage: /torrent <magnet_link_or_torrent_url> [more links ...]"
+        )
+        return
 
-                try:
-                    await context.bot.edit_message_text(
-                        chat_id=chat_id,
-                        message_id=sent_message.message_id,
-                        text=message_text,
-                    )
-                except Exception:
-                    # If can't edit, send a new message
-                    sent_message = await update.message.reply_text(message_text)
+    links = [
+        link
+        for link in context.args
+        if link.startswith("magnet:") or link.endswith(".torrent")
+    ]
+    if len(links) < len(context.args):
+        await update.message.reply_text(
+            "Please provide valid magnet links or torrent file URLs."
+        )
+        if not links:
+            return
 
-                # Store the message ID for tracking
-                if torrent_id not in torrent_messages:
-                    torrent_messages[torrent_id] = {}
-                torrent_messages[torrent_id][chat_id] = sent_message.message_id
+    # Links are added concurrently; add_limiter bounds how many at once
+    added = await asyncio.gather(*(add_link(update, context, link) for link in links))
+    if len(links) > 1:
+        await update.message.reply_text(
+            f"Added {sum(added)} of {len(links)} torrents.", quote=False
+        )
 
-                # Set initial progress tracking
-                torrent_last_progress[torrent_id] = torrent.percent_done * 100
 
-                # Start monitoring if not already running
-                await start_monitoring(context)
+@authorized_only
+async def upload_torrent(update: Update, context: CallbackContext):
+    """Add uploaded .torrent files, taking an album of them as one batch."""
+    message = update.message
+    if message.media_group_id is None:
+        await add_upload(update, context)
+        return
 
-            except Exception as e:
-                await update.message.reply_text(f"Failed to add torrent: {e}")
-        else:
-            await update.message.reply_text(
-                "Please provide a valid magnet link or torrent file URL."
-            )
-    else:
-        await update.message.reply_text("Usage: /torrent <magnet_link_or_torrent_url>")
+    # The files of an album arrive as separate updates right after each other
+    key = (message.chat_id, message.media_group_id)
+    album = pending_albums.get(key)
+    if album is not None:
+        album.append(update)
+        return
+    pending_albums[key] = album = [update]
+    await asyncio.sleep(ALBUM_COLLECT_DELAY)
+    del pending_albums[key]
+
+    added = await asyncio.gather(*(add_upload(update, context) for update in album))
+    if len(album) > 1:
+        await message.reply_text(
+            f"Added {sum(added)} of {len(album)} torrents.", quote=False
+        )
 
 
 @authorized_only
@@ -456,10 +644,7 @@ async def delete_torrent(update: Update, context: CallbackContext):
             success_names.append(f"{torrent.name} (ID: {torrent_id})")
 
             # Clean up tracking data if the torrent was being monitored
-            if torrent_id in torrent_messages:
-                del torrent_messages[torrent_id]
-            if torrent_id in torrent_last_progress:
-                del torrent_last_progress[torrent_id]
+            await monitor.untrack_torrent(torrent_id)
 
         except Exception as e:
             failed_count += 1
@@ -596,84 +781,64 @@ async def stop_torrent(update: Update, context: CallbackContext):
         await update.message.reply_text("No valid torrent IDs provided.")
 
 
-@authorized_only
-async def move_to_movie(update: Update, context: CallbackContext):
-    """Move one or multiple torrents to the Movies directory."""
-    if not context.args:
-        await update.message.reply_text(
-            "Usage: /movie <torrent_id> [torrent_id2 torrent_id3 ...] or /m <torrent_id> [torrent_id2 ...]"
-        )
-        return
-
-    success_count = 0
+async def move_torrents(update: Update, context: CallbackContext, target, label):
+    """Move one or multiple torrents to target and follow the moves to completion."""
+    torrents = {}
     failed_count = 0
-    success_names = []
 
     for arg in context.args:
         try:
             torrent_id = int(arg)
             torrent = await torrent_manager.get_torrent(torrent_id)
-            await torrent_manager.move_torrent_data(torrent_id, MOVIES_DIR)
-            success_count += 1
-            success_names.append(f"{torrent.name} (ID: {torrent_id})")
+            await torrent_manager.move_torrent_data(torrent_id, target)
+            torrents[torrent_id] = torrent.name
         except Exception as e:
             failed_count += 1
             await update.message.reply_text(f"Failed to move torrent {arg}: {e}")
 
-    # Report results
-    if success_count > 0:
-        if success_count == 1:
-            await update.message.reply_text(
-                f"Torrent {success_names[0]} moved to Movies directory."
-            )
-        else:
-            names_text = "\n- ".join(success_names)
-            await update.message.reply_text(
-                f"Successfully moved {success_count} torrents to Movies directory:\n- {names_text}"
-            )
+    # Report progress in a single status message until the data has moved
+    if torrents:
+        names_text = "\n- ".join(
+            f"{name} (ID: {torrent_id})" for torrent_id, name in torrents.items()
+        )
+        status_message = await update.message.reply_text(
+            f"Moving {len(torrents)} torrent{'s' if len(torrents) > 1 else ''} to {label} directory:\n- {names_text}"
+        )
+        await move_tracker.track(
+            context,
+            update.effective_chat.id,
+            status_message.message_id,
+            target,
+            label,
+            torrents,
+        )
 
-    if failed_count == 0 and success_count == 0:
+    if failed_count == 0 and not torrents:
         await update.message.reply_text("No valid torrent IDs provided.")
 
 
 @authorized_only
-async def move_to_tv(update: Update, context: CallbackContext):
-    """Move one or multiple torrents to the TV directory."""
+async def move_to_movie(update: Update, context: CallbackContext):
+    """Move one or multiple torrents to the Movies directory."""
     if not context.args:
         await update.message.reply_text(
-            "Usage: /tv <torrent_id> [torrent_id2 torrent_id3 ...] or /t <torrent_id> [torrent_id2 ...]"
+            "Usage: /movie <torrent_id> [torrent_id2 torrent_id3 ...] or /m <torrent_id> [torrent_id2 ...]"
         )
         return
 
-    success_count = 0
-    failed_count = 0
-    success_names = []
+    await move_torrents(update, context, MOVIES_DIR, "Movies")
 
-    for arg in context.args:
-        try:
-            torrent_id = int(arg)
-            torrent = await torrent_manager.get_torrent(torrent_id)
-            await torrent_manager.move_torrent_data(torrent_id, TV_DIR)
-            success_count += 1
-            success_names.append(f"{torrent.name} (ID: {torrent_id})")
-        except Exception as e:
-            failed_count += 1
-            await update.message.reply_text(f"Failed to move torrent {arg}: {e}")
 
-    # Report results
-    if success_count > 0:
-        if success_count == 1:
-            await update.message.reply_text(
-                f"Torrent {success_names[0]} moved to TV directory."
-            )
-        else:
-            names_text = "\n- ".join(success_names)
-            await update.message.reply_text(
-                f"Successfully moved {success_count} torrents to TV directory:\n- {names_text}"
-            )
+@authorized_only
+async def move_to_tv(update: Update, context: CallbackContext):
+    """Move one or multiple torrents to the TV directory."""
+    if not context.args:
+        await update.message.reply_text(
+            "Usage: /tv <torrent_id> [torrent_id2 torrent_id3 ...] or /t <torrent_id> [torrent_id2 ...]"
+        )
+        return
 
-    if failed_count == 0 and success_count == 0:
-        await update.message.reply_text("No valid torrent IDs provided.")
+    await move_torrents(update, context, TV_DIR, "TV")
 
 
 @authorized_only
@@ -698,18 +863,24 @@ async def info_torrent(update: Update, context: CallbackContext):
             free_space = await torrent_manager.get_free_space(DATA_DIR)
             message_text = format_torrent_message(torrent, free_space)
 
-            # Send initial message
+            # Send initial message, with buttons for the detail tiers
             sent_message = await update.message.reply_text(
-                message_text, parse_mode="HTML", quote=False
+                message_text,
+                parse_mode="HTML",
+                quote=False,
+                reply_markup=info_keyboard(torrent_id),
             )
 
-            # Store the message ID for tracking
-            if torrent_id not in torrent_messages:
-                torrent_messages[torrent_id] = {}
-            torrent_messages[torrent_id][chat_id] = sent_message.message_id
-
-            # Set initial progress tracking
-            torrent_last_progress[torrent_id] = torrent.percent_done * 100
+            # Track the message from the progress it shows now
+            await monitor.track(
+                context.job_queue,
+                chat_id,
+                torrent_id,
+                sent_message.message_id,
+                message_text,
+                torrent.percent_done * 100,
+                keyboard=True,
+            )
 
             success_count += 1
 
@@ -719,14 +890,338 @@ async def info_torrent(update: Update, context: CallbackContext):
                 f"Failed to get info for torrent {arg}: {e}"
             )
 
-    # Start monitoring if we added any torrents to track
-    if success_count > 0:
-        await start_monitoring(context)
-
     if failed_count == 0 and success_count == 0:
         await update.message.reply_text("No valid torrent IDs provided.")
 
 
+async def get_detail_torrent(torrent_id, fields):
+    """Get a torrent with only the fields a detail tier shows."""
+    torrents = await torrent_manager.get_torrent_fields([torrent_id], fields)
+    if not torrents:
+        raise KeyError("Torrent not found in result")
+    return torrents[0]
+
+
+@authorized_only
+async def info_details(update: Update, context: CallbackContext):
+    """Show the detail tier chosen with an /info button."""
+    query = update.callback_query
+    await query.answer()
+    _, tier, torrent_id = query.data.split(":")
+    torrent_id = int(torrent_id)
+
+    try:
+        # Heavy fields are only fetched when asked for, and only those needed
+        if tier == "files":
+            name, files = await torrent_manager.get_files(torrent_id)
+            text = format_file_list(name, files)
+        elif tier == "peers":
+            torrent = await get_detail_torrent(torrent_id, ["name", "peers"])
+            text = format_peer_list(torrent.name, torrent.peers)
+        else:
+            torrent = await get_detail_torrent(torrent_id, ["name", "trackerStats"])
+            text = format_tracker_list(torrent.name, torrent.tracker_stats)
+    except Exception as e:
+        text = html.escape(f"Failed to get the {tier} of torrent {torrent_id}: {e}")
+
+    await query.message.reply_text(
+        text,
+        parse_mode="HTML",
+        quote=False,
+        link_preview_options=LinkPreviewOptions(is_disabled=True),
+    )
+
+
+def parse_search_flags(args, flags):
+    """Split leading -x style flags and a -c category option off command args.
+
+    Returns (set of flags given, categories, remaining args).
+    """
+    args = list(args)
+    given = set()
+    categories = None
+    while args and args[0].startswith("-"):
+        flag = args.pop(0)
+        if flag in ("-c", "--category"):
+            if not args:
+                raise ValueError(f"Option {flag} needs a category")
+            categories = get_categories(args.pop(0))
+        elif flag in flags:
+            given.add(flag)
+        else:
+            raise ValueError(f"Unknown option {flag}")
+    return given, categories, args
+
+
+@authorized_only
+async def watch(update: Update, context: CallbackContext):
+    """Save a search whose new results are reported or added automatically."""
+    if feed_watcher is None:
+        await update.message.reply_text(
+            "Watches are off. Set WATCH_DB to turn them on."
+        )
+        return
+    try:
+        flags, categories, args = parse_search_flags(context.args, {"-a"})
+    except ValueError as e:
+        await update.message.reply_text(str(e))
+        return
+    if not args:
+        await update.message.reply_text(
+            "Usage: /watch [-a] [-c category] <query>\n"
+            "New results are sent to this chat, or added right away with -a."
+        )
+        return
+
+    query = " ".join(args)
+    auto_add = "-a" in flags
+    watch_id = await feed_watcher.store.add(
+        update.effective_chat.id, query, categories, auto_add
+    )
+    feed_watcher.schedule(context.job_queue, watch_id, prime=True)
+    await update.message.reply_text(
+        f"Watching for new results of '{query}' (#{watch_id}); "
+        f"they will be {'added' if auto_add else 'sent here'}."
+    )
+
+
+@authorized_only
+async def list_watches(update: Update, context: CallbackContext):
+    """List the chat's watches."""
+    if feed_watcher is None:
+        await update.message.reply_text(
+            "Watches are off. Set WATCH_DB to turn them on."
+        )
+        return
+    watches = await feed_watcher.store.for_chat(update.effective_chat.id)
+    if not watches:
+        await update.message.reply_text("No watches in this chat.")
+        return
+    lines = [
+        f"#{watch['id']} {watch['query']}"
+        f"{' [' + watch['categories'] + ']' if watch['categories'] else ''}"
+        f"{' (auto-add)' if watch['auto_add'] else ''}"
+        for watch in watches
+    ]
+    await update.message.reply_text("\n".join(lines), quote=False)
+
+
+@authorized_only
+async def unwatch(update: Update, context: CallbackContext):
+    """Delete watches by id."""
+    if feed_watcher is None:
+        await update.message.reply_text(
+            "Watches are off. Set WATCH_DB to turn them on."
+        )
+        return
+    if not context.args:
+        await update.message.reply_text("Usage: /unwatch <watch_id> [watch_id2 ...]")
+        return
+    for arg in context.args:
+        try:
+            watch_id = int(arg.lstrip("#"))
+        except ValueError:
+            await update.message.reply_text(f"Invalid watch id: {arg}")
+            continue
+        if await feed_watcher.store.remove(update.effective_chat.id, watch_id):
+            feed_watcher.unschedule(context.job_queue, watch_id)
+            await update.message.reply_text(f"Watch #{watch_id} deleted.")
+        else:
+            await update.message.reply_text(f"No watch #{watch_id} in this chat.")
+
+
+async def notify_watch_matches(context: CallbackContext, watch, items):
+    """Add or report the new results of a watch, most seeded first.
+
+    Results beyond what fits in WATCH_MAX_MESSAGES messages are counted in
+    the last one; they are already marked as seen.
+    """
+    chat_id = watch["chat_id"]
+    items = sorted(items, key=lambda x: x.get("Seeders", 0), reverse=True)
+    if watch["auto_add"]:
+        for item in items[:WATCH_RESULTS_PER_MESSAGE]:
+            await add_watch_item(context, chat_id, item)
+        left_out = len(items) - WATCH_RESULTS_PER_MESSAGE
+        if left_out > 0:
+            await context.bot.send_message(
+                chat_id=chat_id,
+                text=f"Watch #{watch['id']} '{watch['query']}' found {left_out} "
+                f"more new results that were not added; only the "
+                f"{WATCH_RESULTS_PER_MESSAGE} with the most seeders were.",
+            )
+        return
+
+    chunks = [
+        items[i : i + WATCH_RESULTS_PER_MESSAGE]
+        for i in range(0, len(items), WATCH_RESULTS_PER_MESSAGE)
+    ]
+    left_out = sum(len(chunk) for chunk in chunks[WATCH_MAX_MESSAGES:])
+    chunks = chunks[:WATCH_MAX_MESSAGES]
+    for i, chunk in enumerate(chunks):
+        text = (
+            f"New results for watch #{watch['id']} '{watch['query']}' "
+            f"({i + 1}/{len(chunks)}):\n\n"
+            f"{format_results_table(chunk)}\n\n"
+            "Reply to this message with the index of the torrent you want to download."
+        )
+        if left_out and i == len(chunks) - 1:
+            text += f"\n{left_out} more new results with fewer seeders not shown."
+        sent_message = await context.bot.send_message(
+            chat_id=chat_id, text=f"<pre>{html.escape(text)}</pre>", parse_mode="HTML"
+        )
+        # Replies pick from these results like from a search
+        await result_store.put(chat_id, sent_message.message_id, chunk)
+
+
+async def add_watch_item(context: CallbackContext, chat_id, item):
+    """Add a new result of an auto-add watch and start tracking it."""
+    link = item.get("MagnetUri") or item.get("Link")
+    async with add_limiter:
+        try:
+            if link.startswith("magnet:"):
+                infohash = item.get("InfoHash") or magnet_infohash(link)
+                torrent_source = link
+            else:
+                torrent_source = await download_torrent_file(link)
+                infohash = (await parse_torrent_metainfo(torrent_source))["infohash"]
+            if infohash and await torrent_manager.find_torrent(infohash):
+                return
+            added_torrent = await torrent_manager.add_torrent(torrent_source)
+        except Exception as e:
+            await context.bot.send_message(
+                chat_id=chat_id, text=f"Failed to add {item.get('Title')}: {e}"
+            )
+            return
+
+    message_text = format_added_torrent(
+        added_torrent.id, item.get("Title"), infohash or added_torrent.hash_string
+    )
+    sent_message = await context.bot.send_message(chat_id=chat_id, text=message_text)
+    await monitor.track(
+        context.job_queue,
+        chat_id,
+        added_torrent.id,
+        sent_message.message_id,
+        message_text,
+    )
+
+
+@authorized_only
+async def dashboard(update: Update, context: CallbackContext):
+    """Toggle a single pinned dashboard message summarizing the chat's torrents."""
+    chat_id = update.effective_chat.id
+    turn_off = context.args and context.args[0].lower() == "off"
+
+    # Retire the current dashboard, if any
+    message_id = await monitor.disable_dashboard(chat_id)
+    if message_id is not None:
+        try:
+            await context.bot.unpin_chat_message(chat_id=chat_id, message_id=message_id)
+        except BadRequest:
+            pass
+
+    if turn_off:
+        await update.message.reply_text(
+            "Dashboard turned off. Torrents will be tracked in separate messages."
+        )
+        return
+
+    torrents = []
+    for torrent_id in sorted(await monitor.registry.torrents_for(chat_id)):
+        try:
+            torrents.append(await torrent_manager.get_torrent(torrent_id))
+        except Exception as e:
+            logger.warning(
+                "Error getting torrent %s for dashboard: %s",
+                torrent_id,
+                e,
+                extra={"torrent_id": torrent_id},
+            )
+    free_space = await torrent_manager.get_free_space(DATA_DIR)
+
+    message_text = format_dashboard(torrents, free_space)
+    sent_message = await update.message.reply_text(message_text, quote=False)
+    await monitor.enable_dashboard(chat_id, sent_message.message_id, message_text)
+    try:
+        await context.bot.pin_chat_message(
+            chat_id=chat_id,
+            message_id=sent_message.message_id,
+            disable_notification=True,
+        )
+    except BadRequest as e:
+        logger.warning(
+            "Error pinning dashboard in chat %s: %s",
+            chat_id,
+            e,
+            extra={"chat_id": chat_id},
+        )
+
+    await monitor.start(context.job_queue)
+
+
+@admin_only
+async def indexers(update: Update, context: CallbackContext):
+    """Show per-indexer search latency, error rate and result yield."""
+    report = indexer_stats.format_report()
+    if ADAPTIVE_INDEXERS:
+        excluded = len(indexer_stats.unhealthy_indexers())
+        report += f"\n\nAdaptive mode is on; {excluded} indexer{'s' if excluded != 1 else ''} left out."
+    await update.message.reply_text(report, quote=False)
+
+
+@admin_only
+async def loop_stats(update: Update, context: CallbackContext):
+    """Show event loop stalls and which handlers caused them."""
+    if not LOOP_WATCHDOG:
+        await update.message.reply_text(
+            "The loop watchdog is off. Set LOOP_WATCHDOG=true to enable it."
+        )
+        return
+    await update.message.reply_text(loop_watchdog.format_report(executors), quote=False)
+
+
+async def structure_sizes():
+    """Count the entries of the bot's long-lived structures and caches."""
+    registry = monitor.registry
+    return {
+        "Tracked torrents": len(await registry.torrent_ids()),
+        "Dashboards": len(await registry.dashboards()),
+        "Progress records": len(monitor.last_progress),
+        "Message digests": len(monitor.message_digests),
+        "Moves in progress": len(move_tracker.moves),
+        "Infohash index": len(torrent_manager.hash_index or {}),
+        "Cached file lists": len(torrent_manager.completed_files),
+        "In-flight reads": len(torrent_manager.inflight_reads),
+        "OMDB cache": len(omdb_cache),
+        "In-flight searches": len(inflight_searches),
+        "Chat searches": len(chat_searches),
+        "Indexers with stats": len(indexer_stats.samples),
+        "Pending albums": len(pending_albums),
+    }
+
+
+@admin_only
+async def memory(update: Update, context: CallbackContext):
+    """Report memory use; /memory on|off toggles allocation tracing."""
+    action = context.args[0].lower() if context.args else None
+    if action == "on":
+        memory_profiler.start()
+        await update.message.reply_text(
+            "Allocation tracing is on. Use /memory to report and /memory off to stop it."
+        )
+        return
+    if action == "off":
+        memory_profiler.stop()
+        await update.message.reply_text("Allocation tracing is off.")
+        return
+
+    report = await memory_profiler.report()
+    sizes = format_structure_sizes(
+        await structure_sizes(), await result_store.counts_by_chat()
+    )
+    await update.message.reply_text(f"{report}\n\n{sizes}"[:4000], quote=False)
+
+
 @authorized_only
 async def help_command(update: Update, context: CallbackContext):
     """Show help message with available commands."""
@@ -740,10 +1235,17 @@ async def help_command(update: Update, context: CallbackContext):
 5. */stop <torrent_id>* - *Stops* a torrent.
 6. */m <torrent_id>* or */movie <id>* - *Move* to *Movies* folder.
 7. */t <torrent_id>* or */tv <id>* - *Move* to *TV* folder.
-8. */search or /s <query>* - *Search* for content (e.g., "The Matrix", "Simpsons s01e01").
+8. */search or /s [-c category] <query>* - *Search* for content (e.g., "The Matrix", "Simpsons s01e01"). Categories: movie, tv, music, books, software, games.
 9. */imdb <link>* - Search using *IMDb information*.
-10. */torrent or /magnet or /add <magnet_link>* - *Add* a torrent via magnet link.
+10. */torrent or /magnet or /add <magnet_link> ...* - *Add* one or more torrents via magnet links or .torrent URLs.
 11. */info or /i <torrent_id>* - Get *detailed info* about a torrent.
+12. */dashboard [off]* - Track all torrents in one *pinned dashboard* message.
+13. */indexers* - Show Jackett *indexer statistics* (admins).
+14. */searchmovie or /sm <query>* and */searchtv or /st <query>* - *Search* only movies or TV.
+15. */loopstats* - Show *event loop stalls* by handler (admins).
+16. */watch [-a] [-c category] <query>* - *Watch* for new results, adding them with -a. */watches* lists them and */unwatch <id>* deletes one.
+17. */memory [on|off]* - Report *memory use* and allocation growth (admins).
+18. Send or forward *.torrent files*, also several at once, to *add* them.
 
 💬 */help or /h* - *Shows this help message*.
 """
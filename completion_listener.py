@@ -0,0 +1,86 @@
+import hmac
+import logging
+import asyncio
+from aiohttp import web
+from config import (
+    COMPLETION_LISTENER_HOST,
+    COMPLETION_LISTENER_PORT,
+    COMPLETION_LISTENER_SOCKET,
+    COMPLETION_TOKEN,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def completion_listener_enabled():
+    """Check whether a completion listener address is configured."""
+    return bool(COMPLETION_LISTENER_PORT or COMPLETION_LISTENER_SOCKET)
+
+
+class CompletionListener:
+    """Local endpoint for the events sent by scripts/torrent-done.sh.
+
+    Transmission runs the script through script-torrent-done-filename when a
+    torrent finishes, and the script posts the torrent's id and hash here.
+    """
+
+    def __init__(self, on_torrent_done):
+        self.on_torrent_done = on_torrent_done
+        self.runner = None
+        self.tasks = set()
+
+    async def start(self):
+        """Start listening on the configured unix socket or TCP port."""
+        app = web.Application()
+        app.router.add_post("/torrent-done", self.handle_torrent_done)
+        self.runner = web.AppRunner(app, access_log=None)
+        await self.runner.setup()
+
+        if COMPLETION_LISTENER_SOCKET:
+            site = web.UnixSite(self.runner, COMPLETION_LISTENER_SOCKET)
+            logger.info(
+                "Listening for completion events on %s", COMPLETION_LISTENER_SOCKET
+            )
+        else:
+            site = web.TCPSite(
+                self.runner, COMPLETION_LISTENER_HOST, COMPLETION_LISTENER_PORT
+            )
+            logger.info(
+                "Listening for completion events on %s:%s",
+                COMPLETION_LISTENER_HOST,
+                COMPLETION_LISTENER_PORT,
+            )
+        await site.start()
+        if not COMPLETION_TOKEN:
+            logger.warning(
+                "COMPLETION_TOKEN is not set; completion events are accepted "
+                "from anyone who can reach the listener."
+            )
+
+    async def stop(self):
+        """Stop the listener."""
+        if self.runner is not None:
+            await self.runner.cleanup()
+            self.runner = None
+
+    async def handle_torrent_done(self, request):
+        """Handle a "torrent finished" event."""
+        # Compare bytes, since compare_digest rejects non-ASCII strings
+        if COMPLETION_TOKEN and not hmac.compare_digest(
+            request.headers.get("X-Token", "").encode("utf-8", "surrogateescape"),
+            COMPLETION_TOKEN.encode(),
+        ):
+            return web.Response(status=401, text="Unauthorized")
+
+        data = await request.post()
+        try:
+            torrent_id = int(data.get("id", ""))
+        except ValueError:
+            return web.Response(status=400, text="Missing or invalid torrent id")
+        infohash = data.get("hash") or None
+
+        # Finalize in the background so Transmission's script returns right away
+        task = asyncio.create_task(self.on_torrent_done(torrent_id, infohash))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+        return web.Response(text="OK")
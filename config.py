@@ -26,20 +26,111 @@ JACKETT_TOKEN = os.getenv("JACKETT_TOKEN")
 if not JACKETT_TOKEN:
     raise ValueError("JACKETT_TOKEN environment variable is required")
 
+# Concurrent Jackett searches, and seconds before a search times out
+JACKETT_MAX_CONCURRENT = int(os.getenv("JACKETT_MAX_CONCURRENT", 3))
+JACKETT_TIMEOUT = int(os.getenv("JACKETT_TIMEOUT", 60))
+
+# Per-indexer statistics over the last INDEXER_STATS_WINDOW searches.
+# In adaptive mode, indexers slower than INDEXER_SLOW_MS or failing more often
+# than INDEXER_MAX_ERROR_RATE are left out of searches and probed in the
+# background every INDEXER_PROBE_INTERVAL seconds until they recover
+ADAPTIVE_INDEXERS = os.getenv("ADAPTIVE_INDEXERS", "false").lower() == "true"
+INDEXER_STATS_WINDOW = int(os.getenv("INDEXER_STATS_WINDOW", 20))
+INDEXER_MIN_SAMPLES = int(os.getenv("INDEXER_MIN_SAMPLES", 3))
+INDEXER_SLOW_MS = int(os.getenv("INDEXER_SLOW_MS", 15000))
+INDEXER_MAX_ERROR_RATE = float(os.getenv("INDEXER_MAX_ERROR_RATE", 0.5))
+INDEXER_PROBE_INTERVAL = int(os.getenv("INDEXER_PROBE_INTERVAL", 300))
+INDEXER_PROBE_QUERY = os.getenv("INDEXER_PROBE_QUERY", "test")
+
+# Local full-text index of seen Jackett results, used to answer searches
+# instantly while Jackett is queried; results unseen for RESULT_INDEX_MAX_AGE
+# seconds are dropped. Leave RESULT_INDEX empty to turn it off
+RESULT_INDEX = os.getenv("RESULT_INDEX")
+RESULT_INDEX_MAX_AGE = int(os.getenv("RESULT_INDEX_MAX_AGE", 7 * 24 * 60 * 60))
+
+# Logging: level, "text" or "json" output, and seconds between repeats of
+# the same warning or error
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text").lower()
+LOG_RATE_LIMIT = int(os.getenv("LOG_RATE_LIMIT", 60))
+
+# Opt-in event loop watchdog: stalls longer than LOOP_LAG_THRESHOLD_MS are
+# logged with the blocking stack and counted per handler
+LOOP_WATCHDOG = os.getenv("LOOP_WATCHDOG", "false").lower() == "true"
+LOOP_LAG_THRESHOLD_MS = int(os.getenv("LOOP_LAG_THRESHOLD_MS", 250))
+
 # OMDB configuration
 OMDB_TOKEN = os.getenv("OMDB_TOKEN")
 if not OMDB_TOKEN:
     raise ValueError("OMDB_TOKEN environment variable is required")
 
+# Seconds to reuse an OMDB lookup
+OMDB_CACHE_TTL = int(os.getenv("OMDB_CACHE_TTL", 24 * 60 * 60))
+
 # File paths
 DATA_DIR = os.getenv("DATA_DIR", "/data")
 MOVIES_DIR = os.getenv("MOVIES_DIR", f"{DATA_DIR}/completed/Movies")
 TV_DIR = os.getenv("TV_DIR", f"{DATA_DIR}/completed/TV")
 
+# Multi-replica mode: share subscriptions and search results through a store
+# such as sqlite:////data/bot-state.sqlite3; replicas elect one leader to run
+# the progress monitor and retry the election every LEADER_CHECK_INTERVAL
+SHARED_STORE = os.getenv("SHARED_STORE")
+LEADER_CHECK_INTERVAL = int(os.getenv("LEADER_CHECK_INTERVAL", 2))
+
+# Receive updates through a webhook instead of polling, which replicas need
+# so that they don't fight over getUpdates
+WEBHOOK_URL = os.getenv("WEBHOOK_URL")
+WEBHOOK_LISTEN = os.getenv("WEBHOOK_LISTEN", "0.0.0.0")
+WEBHOOK_PORT = int(os.getenv("WEBHOOK_PORT", 8443))
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET")
+
+# Torrents added to Transmission at once, across all chats; shared by /torrent
+# links, uploads and watch auto-adds
+ADD_CONCURRENCY = int(os.getenv("ADD_CONCURRENCY", 4))
+
+# Saved search filters whose Torznab feeds are polled every WATCH_INTERVAL
+# seconds, kept with their seen items in the WATCH_DB SQLite file; seen items
+# are forgotten after WATCH_SEEN_MAX_AGE seconds. Leave WATCH_DB empty to
+# turn watches off
+WATCH_DB = os.getenv("WATCH_DB")
+WATCH_INTERVAL = int(os.getenv("WATCH_INTERVAL", 30 * 60))
+WATCH_SEEN_MAX_AGE = int(os.getenv("WATCH_SEEN_MAX_AGE", 90 * 24 * 60 * 60))
+
+# Seconds between progress updates of tracked torrents
+MONITOR_INTERVAL = int(os.getenv("MONITOR_INTERVAL", 5))
+
+# Give up following a data move after this many seconds
+MOVE_TIMEOUT = int(os.getenv("MOVE_TIMEOUT", 6 * 60 * 60))
+
+# Push completion events from Transmission's script-torrent-done hook
+# Set a port or a unix socket path to enable the listener
+COMPLETION_LISTENER_HOST = os.getenv("COMPLETION_LISTENER_HOST", "127.0.0.1")
+COMPLETION_LISTENER_PORT = int(os.getenv("COMPLETION_LISTENER_PORT") or 0) or None
+COMPLETION_LISTENER_SOCKET = os.getenv("COMPLETION_LISTENER_SOCKET")
+COMPLETION_TOKEN = os.getenv("COMPLETION_TOKEN")
+
+# Timezone used for dates in messages
+TIMEZONE = os.getenv("TIMEZONE", "America/New_York")
+
 # Download Link Prefix
 DOWNLOAD_LINK_PREFIX = os.getenv("DOWNLOAD_LINK_PREFIX")
 
 
+# Transmission RPC threads per priority class
+RPC_INTERACTIVE_WORKERS = int(os.getenv("RPC_INTERACTIVE_WORKERS", 6))
+RPC_MONITOR_WORKERS = int(os.getenv("RPC_MONITOR_WORKERS", 3))
+RPC_BULK_WORKERS = int(os.getenv("RPC_BULK_WORKERS", 1))
+
+# Search results kept for replies, by age (seconds) and total count
+SEARCH_RESULTS_TTL = int(os.getenv("SEARCH_RESULTS_TTL", 24 * 60 * 60))
+SEARCH_RESULTS_MAX = int(os.getenv("SEARCH_RESULTS_MAX", 5000))
+
+# Torrent file parsing
+MAX_TORRENT_FILE_SIZE = int(os.getenv("MAX_TORRENT_FILE_SIZE", 10 * 1024 * 1024))
+METAINFO_WORKERS = int(os.getenv("METAINFO_WORKERS", 2))
+
+
 # Retry settings for Transmission connection
 MAX_RETRIES = int(os.getenv("MAX_RETRIES", 300))
 RETRY_DELAY = int(os.getenv("RETRY_DELAY", 60))
@@ -51,3 +142,11 @@ AUTHORIZED_USERS = [
     for user_id in os.getenv("AUTHORIZED_USERS", "").split(",")
     if user_id.strip()
 ] or None
+
+# Users allowed to run admin commands (Telegram user IDs)
+# Defaults to the authorized users
+ADMIN_USERS = [
+    int(user_id)
+    for user_id in os.getenv("ADMIN_USERS", "").split(",")
+    if user_id.strip()
+] or AUTHORIZED_USERS
@@ -0,0 +1,248 @@
+import os
+import time
+import hashlib
+import logging
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from telegram.ext import CallbackContext
+from jackett import fetch_torznab_feed
+from shared_store import in_store_thread
+from config import WATCH_INTERVAL, WATCH_SEEN_MAX_AGE
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS watches (
+    id INTEGER PRIMARY KEY,
+    chat_id INTEGER NOT NULL,
+    query TEXT NOT NULL,
+    categories TEXT NOT NULL,
+    auto_add INTEGER NOT NULL,
+    primed INTEGER NOT NULL DEFAULT 0,
+    etag TEXT,
+    last_modified TEXT
+);
+CREATE TABLE IF NOT EXISTS seen (
+    watch_id INTEGER NOT NULL,
+    digest BLOB NOT NULL,
+    seen REAL NOT NULL,
+    PRIMARY KEY (watch_id, digest)
+) WITHOUT ROWID;
+"""
+
+# Golden ratio fraction; spreads watch ids evenly over the poll interval
+STAGGER_STEP = 0.618033988749895
+
+# Seconds between syncs of the polling jobs with the store when replicas share it
+WATCH_SYNC_INTERVAL = 30
+
+
+def item_digests(item):
+    """Get compact digests of the keys that identify a feed item.
+
+    An item counts as seen if either its infohash or its GUID was seen, so a
+    torrent re-posted under a new GUID is still recognized.
+    """
+    keys = []
+    if item.get("InfoHash"):
+        keys.append("btih:" + item["InfoHash"].lower())
+    guid = item.get("Guid") or item.get("MagnetUri") or item.get("Link")
+    if guid:
+        keys.append("guid:" + guid)
+    return [hashlib.blake2b(key.encode(), digest_size=8).digest() for key in keys]
+
+
+class WatchStore:
+    """Saved feed filters and the items already seen for each, in SQLite.
+
+    Queries run on a thread of the store's own, so polls never block the
+    event loop.
+    """
+
+    def __init__(self, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        # Opened here, then only used from the store thread
+        self.db = sqlite3.connect(path, timeout=5, check_same_thread=False)
+        self.db.row_factory = sqlite3.Row
+        self.db.executescript(SCHEMA)
+        self.executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="watch-store"
+        )
+
+    @in_store_thread
+    def add(self, chat_id, query, categories, auto_add):
+        """Save a filter and return its id."""
+        with self.db:
+            cursor = self.db.execute(
+                "INSERT INTO watches (chat_id, query, categories, auto_add) "
+                "VALUES (?, ?, ?, ?)",
+                (
+                    chat_id,
+                    query,
+                    " ".join(str(category) for category in categories or ()),
+                    int(auto_add),
+                ),
+            )
+        return cursor.lastrowid
+
+    @in_store_thread
+    def remove(self, chat_id, watch_id):
+        """Delete a chat's filter and its seen items; return whether it existed."""
+        with self.db:
+            deleted = self.db.execute(
+                "DELETE FROM watches WHERE id = ? AND chat_id = ?", (watch_id, chat_id)
+            ).rowcount
+            if deleted:
+                self.db.execute("DELETE FROM seen WHERE watch_id = ?", (watch_id,))
+        return bool(deleted)
+
+    @in_store_thread
+    def get(self, watch_id):
+        """Get a filter, or None if it was removed."""
+        return self.db.execute(
+            "SELECT * FROM watches WHERE id = ?", (watch_id,)
+        ).fetchone()
+
+    @in_store_thread
+    def all(self):
+        """Get every saved filter."""
+        return self.db.execute("SELECT * FROM watches ORDER BY id").fetchall()
+
+    @in_store_thread
+    def for_chat(self, chat_id):
+        """Get a chat's filters."""
+        return self.db.execute(
+            "SELECT * FROM watches WHERE chat_id = ? ORDER BY id", (chat_id,)
+        ).fetchall()
+
+    @in_store_thread
+    def take_new(self, watch_id, items):
+        """Mark items as seen and return the ones that weren't."""
+        now = time.time()
+        new_items = []
+        with self.db:
+            for item in items:
+                digests = item_digests(item)
+                if not digests:
+                    continue
+                placeholders = ", ".join("?" * len(digests))
+                seen = self.db.execute(
+                    f"SELECT 1 FROM seen WHERE watch_id = ? AND digest IN ({placeholders})",
+                    (watch_id, *digests),
+                ).fetchone()
+                self.db.executemany(
+                    "INSERT OR REPLACE INTO seen VALUES (?, ?, ?)",
+                    [(watch_id, digest, now) for digest in digests],
+                )
+                if seen is None:
+                    new_items.append(item)
+            self.db.execute(
+                "DELETE FROM seen WHERE watch_id = ? AND seen < ?",
+                (watch_id, now - WATCH_SEEN_MAX_AGE),
+            )
+        return new_items
+
+    @in_store_thread
+    def update_feed_state(self, watch_id, etag, last_modified):
+        """Remember the validators of a feed's last response; the watch is primed."""
+        with self.db:
+            self.db.execute(
+                "UPDATE watches SET etag = ?, last_modified = ?, primed = 1 WHERE id = ?",
+                (etag, last_modified, watch_id),
+            )
+
+
+class FeedWatcher:
+    """Polls the Torznab feed of every saved filter on a staggered schedule."""
+
+    def __init__(self, store, on_new_items, interval=WATCH_INTERVAL, is_active=None):
+        self.store = store
+        # Awaited with (context, watch, items) for items not seen before
+        self.on_new_items = on_new_items
+        self.interval = interval
+        # Replicas only poll while this returns True
+        self.is_active = is_active or (lambda: True)
+
+    def schedule(self, job_queue, watch_id, prime=False):
+        """Start polling a filter, at its own offset within the interval.
+
+        With prime, the feed is also read right away to record what exists.
+        """
+        if prime:
+            job_queue.run_once(self.poll, 0, name=f"watch:{watch_id}", data=watch_id)
+        offset = (watch_id * STAGGER_STEP) % 1 * self.interval
+        job_queue.run_repeating(
+            self.poll,
+            interval=self.interval,
+            first=offset,
+            name=f"watch:{watch_id}",
+            data=watch_id,
+        )
+
+    def unschedule(self, job_queue, watch_id):
+        """Stop polling a filter."""
+        for job in job_queue.get_jobs_by_name(f"watch:{watch_id}"):
+            job.schedule_removal()
+
+    async def sync(self, context: CallbackContext):
+        """Poll exactly the saved filters while active, and none otherwise.
+
+        Replicas sharing a store run this periodically, so the monitor leader
+        picks up watches created on other replicas and after taking over.
+        """
+        job_queue = context.job_queue
+        scheduled = {
+            job.data
+            for job in job_queue.jobs()
+            if (job.name or "").startswith("watch:")
+        }
+        if not self.is_active():
+            for watch_id in scheduled:
+                self.unschedule(job_queue, watch_id)
+            return
+
+        watches = await self.store.all()
+        for watch in watches:
+            if watch["id"] not in scheduled:
+                # A watch added on another replica may not have been read yet
+                self.schedule(job_queue, watch["id"], prime=not watch["primed"])
+        for watch_id in scheduled - {watch["id"] for watch in watches}:
+            self.unschedule(job_queue, watch_id)
+
+    async def poll(self, context: CallbackContext):
+        """Poll one filter's feed and report the items not seen before."""
+        if not self.is_active():
+            return
+        watch = await self.store.get(context.job.data)
+        if watch is None:
+            context.job.schedule_removal()
+            return
+
+        categories = [int(category) for category in watch["categories"].split()]
+        try:
+            items, etag, last_modified = await fetch_torznab_feed(
+                watch["query"], categories, watch["etag"], watch["last_modified"]
+            )
+        except Exception as e:
+            logger.warning(
+                "Error polling feed of watch %s: %s",
+                watch["id"],
+                e,
+                extra={"watch_id": watch["id"]},
+            )
+            return
+        if items is None:
+            # Not modified since the last poll
+            return
+
+        new_items = await self.store.take_new(watch["id"], items)
+        await self.store.update_feed_state(watch["id"], etag, last_modified)
+        # The first poll only records what already exists
+        if new_items and watch["primed"]:
+            logger.info(
+                "Watch %s found %d new items.",
+                watch["id"],
+                len(new_items),
+                extra={"watch_id": watch["id"]},
+            )
+            await self.on_new_items(context, watch, new_items)
@@ -1,6 +1,22 @@
+import time
 import aiohttp
+from collections import OrderedDict
 from urllib.parse import urlparse, unquote
-from config import OMDB_TOKEN
+from config import OMDB_TOKEN, OMDB_CACHE_TTL
+
+# Search category names (see jackett.CATEGORIES) for OMDB's Type field
+OMDB_TYPE_CATEGORIES = {
+    "movie": "movie",
+    "series": "tv",
+    "episode": "tv",
+    "game": "games",
+}
+
+# Most OMDB lookups kept at once
+OMDB_CACHE_SIZE = 1024
+
+# Maps IMDb ID -> (expiry, OMDB data), soonest expiry first
+omdb_cache = OrderedDict()
 
 
 def get_omdb_token():
@@ -21,22 +37,48 @@ def extract_imdb_id(imdb_url):
         raise ValueError("Couldn't find the IMDb ID from the URL")
 
 
+async def get_omdb_data(imdb_id):
+    """Get OMDB's data for an IMDb ID, from the cache if looked up recently."""
+    cached = omdb_cache.get(imdb_id)
+    if cached is not None and cached[0] > time.monotonic():
+        return cached[1]
+
+    token = get_omdb_token()
+    omdb_url = f"http://www.omdbapi.com/?apikey={token}&i={imdb_id}"
+
+    async with aiohttp.ClientSession() as session:
+        async with session.get(omdb_url) as response:
+            response.raise_for_status()
+            data = await response.json()
+
+    # Only cache successful lookups, so errors are retried next time
+    if data.get("Response") == "True":
+        now = time.monotonic()
+        omdb_cache[imdb_id] = (now + OMDB_CACHE_TTL, data)
+        omdb_cache.move_to_end(imdb_id)
+        # Entries share one TTL, so the expired ones are at the front
+        while omdb_cache and (
+            len(omdb_cache) > OMDB_CACHE_SIZE
+            or next(iter(omdb_cache.values()))[0] <= now
+        ):
+            omdb_cache.popitem(last=False)
+    return data
+
+
 async def get_imdb_info(imdb_url):
-    """Get movie/show information from IMDb URL using OMDB API asynchronously."""
+    """Get movie/show information from IMDb URL using OMDB API asynchronously.
+
+    Returns the search query and OMDB's type of the title, which is None if
+    the lookup failed and the query holds the error instead.
+    """
     try:
         imdb_id = extract_imdb_id(imdb_url)
-        token = get_omdb_token()
-        omdb_url = f"http://www.omdbapi.com/?apikey={token}&i={imdb_id}"
-
-        async with aiohttp.ClientSession() as session:
-            async with session.get(omdb_url) as response:
-                response.raise_for_status()
-                data = await response.json()
+        data = await get_omdb_data(imdb_id)
 
-                if data.get("Response") == "True":
-                    return f"{data.get('Title')} {data.get('Year')}"
-                else:
-                    return data.get("Error")
+        if data.get("Response") == "True":
+            return (f"{data.get('Title')} {data.get('Year')}", data.get("Type"))
+        else:
+            return (data.get("Error"), None)
 
     except Exception as e:
-        return str(e)
+        return (str(e), None)
@@ -0,0 +1,147 @@
+import time
+from collections import deque
+from config import (
+    INDEXER_STATS_WINDOW,
+    INDEXER_SLOW_MS,
+    INDEXER_MAX_ERROR_RATE,
+    INDEXER_MIN_SAMPLES,
+)
+
+# Jackett's ManualSearchResultIndexer status for an indexer that failed
+INDEXER_STATUS_ERROR = 1
+
+
+class IndexerStats:
+    """Rolling per-indexer latency, error rate and result yield of Jackett searches."""
+
+    def __init__(self, window=INDEXER_STATS_WINDOW):
+        self.window = window
+        self.samples = {}  # Maps indexer id -> deque of samples, newest last
+        self.names = {}  # Maps indexer id -> display name
+        self.configured = set()  # Indexer ids Jackett last reported as configured
+
+    def record(self, data, shown_results):
+        """Record the Indexers metadata of a Jackett response.
+
+        shown_results are the results shown to the user; each indexer's share
+        of them is its useful-result yield.
+        """
+        shown = {}
+        for result in shown_results:
+            tracker_id = result.get("TrackerId")
+            shown[tracker_id] = shown.get(tracker_id, 0) + 1
+
+        for indexer in data.get("Indexers") or []:
+            indexer_id = indexer.get("ID")
+            if not indexer_id:
+                continue
+            self.names[indexer_id] = indexer.get("Name") or indexer_id
+            self.add_sample(
+                indexer_id,
+                elapsed_ms=indexer.get("ElapsedTime"),
+                failed=indexer.get("Status") == INDEXER_STATUS_ERROR
+                or bool(indexer.get("Error")),
+                results=indexer.get("Results") or 0,
+                useful=shown.get(indexer_id, 0),
+            )
+
+    def add_sample(self, indexer_id, elapsed_ms, failed, results, useful):
+        """Add one search outcome for an indexer."""
+        if indexer_id not in self.samples:
+            self.samples[indexer_id] = deque(maxlen=self.window)
+        self.samples[indexer_id].append(
+            {
+                "time": time.time(),
+                "elapsed_ms": elapsed_ms,
+                "failed": failed,
+                "results": results,
+                "useful": useful,
+            }
+        )
+
+    def set_configured(self, indexers):
+        """Record the {id -> name} of the indexers configured in Jackett."""
+        self.configured = set(indexers)
+        for indexer_id, name in indexers.items():
+            self.names.setdefault(indexer_id, name)
+
+    def reset(self, indexer_id):
+        """Forget an indexer's history, e.g. after it recovered."""
+        self.samples.pop(indexer_id, None)
+
+    def summary(self, indexer_id):
+        """Summarize an indexer's recent searches."""
+        samples = self.samples.get(indexer_id) or ()
+        latencies = sorted(
+            sample["elapsed_ms"]
+            for sample in samples
+            if sample["elapsed_ms"] is not None and not sample["failed"]
+        )
+        results = sum(sample["results"] for sample in samples)
+        useful = sum(sample["useful"] for sample in samples)
+        return {
+            "name": self.names.get(indexer_id, indexer_id),
+            "samples": len(samples),
+            "median_ms": latencies[len(latencies) // 2] if latencies else None,
+            "error_rate": (
+                sum(sample["failed"] for sample in samples) / len(samples)
+                if samples
+                else 0.0
+            ),
+            "results": results,
+            "yield": useful / results if results else 0.0,
+        }
+
+    def is_unhealthy(self, indexer_id):
+        """Check whether an indexer has recently been too slow or failing too often."""
+        summary = self.summary(indexer_id)
+        if summary["samples"] < INDEXER_MIN_SAMPLES:
+            return False
+        if summary["error_rate"] > INDEXER_MAX_ERROR_RATE:
+            return True
+        return (
+            summary["median_ms"] is not None and summary["median_ms"] > INDEXER_SLOW_MS
+        )
+
+    def unhealthy_indexers(self):
+        """Get the ids of indexers that adaptive mode leaves out."""
+        return {
+            indexer_id for indexer_id in self.samples if self.is_unhealthy(indexer_id)
+        }
+
+    def healthy_indexers(self):
+        """Get the ids of known indexers that adaptive mode still queries.
+
+        Once Jackett has reported its configured indexers, those are the
+        known ones, so a newly added indexer gets queried and can build up a
+        history, and a removed one is no longer asked for.
+        """
+        return sorted(
+            indexer_id
+            for indexer_id in self.configured or self.samples
+            if not self.is_unhealthy(indexer_id)
+        )
+
+    def format_report(self):
+        """Format the per-indexer statistics for the admin command."""
+        if not self.samples:
+            return "No indexer statistics recorded yet."
+
+        lines = []
+        for indexer_id in sorted(
+            self.samples, key=lambda indexer_id: self.names[indexer_id].lower()
+        ):
+            summary = self.summary(indexer_id)
+            median = (
+                f"{summary['median_ms'] / 1000:.1f}s"
+                if summary["median_ms"] is not None
+                else "-"
+            )
+            flag = " ⛔" if self.is_unhealthy(indexer_id) else ""
+            lines.append(
+                f"{summary['name']}{flag}\n"
+                f"  median {median} · errors {summary['error_rate']:.0%} · "
+                f"yield {summary['yield']:.0%} of {summary['results']} "
+                f"({summary['samples']} searches)"
+            )
+        return "\n".join(lines)
@@ -1,8 +1,28 @@
 import aiohttp
 import asyncio
+import logging
+from collections import deque
 from prettytable import PrettyTable
 import textwrap
-from config import JACKETT_URL, JACKETT_TOKEN
+import xml.etree.ElementTree as ElementTree
+from config import (
+    JACKETT_URL,
+    JACKETT_TOKEN,
+    JACKETT_MAX_CONCURRENT,
+    JACKETT_TIMEOUT,
+    MAX_TORRENT_FILE_SIZE,
+    ADAPTIVE_INDEXERS,
+    INDEXER_PROBE_QUERY,
+    INDEXER_SLOW_MS,
+    RESULT_INDEX,
+)
+from indexer_stats import IndexerStats, INDEXER_STATUS_ERROR
+from result_index import ResultIndex
+
+logger = logging.getLogger(__name__)
+
+# XML namespace of the torznab:attr elements in Torznab feeds
+TORZNAB_NAMESPACE = "{http://torznab.com/schemas/2015/feed}"
 
 
 def get_jackett_url():
@@ -27,23 +47,303 @@ def human_readable_size(size, decimal_places=2):
     return f"{size:.{decimal_places}f} {unit}"
 
 
-async def request_jackett(query):
-    """Search for torrents using Jackett API asynchronously."""
-    print(f"Querying Jackett... {query}")
-    token = get_jackett_token()
+# Torznab category ids by the names used in commands
+CATEGORIES = {
+    "movie": [2000],
+    "movies": [2000],
+    "tv": [5000],
+    "music": [3000],
+    "books": [7000],
+    "software": [4000],
+    "games": [1000, 4050],
+}
+
+
+def get_categories(name):
+    """Get the Torznab category ids for a category name."""
+    try:
+        return CATEGORIES[name.lower()]
+    except KeyError:
+        raise ValueError(
+            f"Unknown category '{name}'. Use one of: {', '.join(CATEGORIES)}"
+        )
+
+
+class SearchLimiter:
+    """Bound the number of concurrent Jackett requests, queuing the rest in order."""
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.active = 0
+        self.waiters = deque()
+
+    def queued(self):
+        """Get the number of requests waiting for a slot."""
+        return len(self.waiters)
+
+    def is_full(self):
+        """Check whether a new request would have to wait."""
+        return self.active >= self.limit or bool(self.waiters)
+
+    async def acquire(self):
+        """Wait for a free slot."""
+        if not self.is_full():
+            self.active += 1
+            return
+        future = asyncio.get_running_loop().create_future()
+        self.waiters.append(future)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future in self.waiters:
+                self.waiters.remove(future)
+            elif not future.cancelled():
+                # The slot was handed over just as we were cancelled
+                self.release()
+            raise
+
+    def release(self):
+        """Free a slot, handing it to the next waiter if there is one."""
+        while self.waiters:
+            future = self.waiters.popleft()
+            if not future.done():
+                future.set_result(None)
+                return
+        self.active -= 1
+
+
+search_limiter = SearchLimiter(JACKETT_MAX_CONCURRENT)
+indexer_stats = IndexerStats()
+result_index = ResultIndex(RESULT_INDEX) if RESULT_INDEX else None
+
+# Maps normalized query -> {"task": shared request task, "waiters": waiter count}
+inflight_searches = {}
+
 
-    params = {"apikey": token, "Query": query}
+def normalize_query(query):
+    """Normalize a search query so equivalent searches share a request."""
+    return " ".join(query.lower().split())
+
+
+def _forget_search(key, task):
+    """Drop a finished search from the in-flight table."""
+    flight = inflight_searches.get(key)
+    if flight is not None and flight["task"] is task:
+        del inflight_searches[key]
+    # Mark the exception as retrieved in case every waiter was cancelled
+    if not task.cancelled():
+        task.exception()
+
+
+async def request_jackett(query, on_queued=None, categories=None):
+    """Search Jackett, sharing one request between concurrent identical queries.
+
+    categories limits the search to Torznab category ids. If the request has
+    to wait for a free slot, on_queued is awaited with the number of requests
+    ahead of it.
+    """
+    key = (normalize_query(query), tuple(sorted(categories or ())))
+    flight = inflight_searches.get(key)
+    queued = False
+    if flight is None:
+        queued = search_limiter.is_full()
+        ahead = search_limiter.queued()
+        # Register the flight before awaiting anything, so identical queries share it
+        task = asyncio.create_task(_limited_request_jackett(query, categories))
+        flight = {"task": task, "waiters": 0}
+        inflight_searches[key] = flight
+        task.add_done_callback(lambda t: _forget_search(key, t))
+
+    flight["waiters"] += 1
+    try:
+        if queued and on_queued is not None:
+            await on_queued(ahead)
+        # Shield the shared request so a cancelled waiter doesn't cancel it for others
+        return await asyncio.shield(flight["task"])
+    except asyncio.CancelledError:
+        # Nobody is left waiting, so don't keep Jackett busy for nothing
+        if flight["waiters"] == 1:
+            flight["task"].cancel()
+        raise
+    finally:
+        flight["waiters"] -= 1
+
+
+async def _limited_request_jackett(query, categories=None):
+    """Query Jackett once a concurrency slot is free."""
+    await search_limiter.acquire()
+    try:
+        return await _request_jackett(query, categories)
+    finally:
+        search_limiter.release()
+
+
+async def _fetch_jackett(params):
+    """Get the JSON response of Jackett's results endpoint."""
+    params = [("apikey", get_jackett_token()), *params]
     url = f"{get_jackett_url()}/api/v2.0/indexers/all/results"
+    timeout = aiohttp.ClientTimeout(total=JACKETT_TIMEOUT)
+
+    async with aiohttp.ClientSession(timeout=timeout) as session:
+        async with session.get(url, params=params) as response:
+            response.raise_for_status()
+            return await response.json()
+
+
+async def _request_jackett(query, categories=None):
+    """Search for torrents using Jackett API asynchronously."""
+    logger.info("Querying Jackett... %s", query, extra={"query": query})
+    params = [("Query", query)]
+
+    # Let Jackett and its indexers filter by category on their side
+    params += [("Category[]", category) for category in categories or ()]
+
+    # Leave slow or failing indexers out of interactive searches
+    if ADAPTIVE_INDEXERS and indexer_stats.unhealthy_indexers():
+        params += [
+            ("Tracker[]", indexer_id) for indexer_id in indexer_stats.healthy_indexers()
+        ]
 
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, params=params) as response:
-                response.raise_for_status()
-                data = await response.json()
-                formatted_results, results = format_search_results(data)
-                return (formatted_results, results)
+        data = await _fetch_jackett(params)
+        formatted_results, results = format_search_results(data)
+        indexer_stats.record(data, results[:10])
+        if result_index is not None:
+            result_index.add(results)
+        return (formatted_results, results)
     except aiohttp.ClientError as e:
         return (f"Error querying Jackett: {str(e)}", None)
+    except asyncio.TimeoutError:
+        return (f"Jackett did not answer within {JACKETT_TIMEOUT} seconds.", None)
+
+
+async def fetch_torznab_feed(query, categories=None, etag=None, last_modified=None):
+    """Get the Torznab RSS feed of a search, if it changed since the last poll.
+
+    Returns (items, etag, last_modified); items is None when Jackett answers
+    304 Not Modified to the conditional GET.
+    """
+    params = [("apikey", get_jackett_token()), ("t", "search"), ("q", query)]
+    if categories:
+        params.append(("cat", ",".join(str(category) for category in categories)))
+    headers = {}
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+    url = f"{get_jackett_url()}/api/v2.0/indexers/all/results/torznab/api"
+    timeout = aiohttp.ClientTimeout(total=JACKETT_TIMEOUT)
+
+    async with aiohttp.ClientSession(timeout=timeout) as session:
+        async with session.get(url, params=params, headers=headers) as response:
+            if response.status == 304:
+                return None, etag, last_modified
+            response.raise_for_status()
+            body = await response.read()
+            response_headers = response.headers
+
+    # Large feeds take a while to parse, so keep that off the event loop
+    items = await asyncio.get_running_loop().run_in_executor(
+        None, parse_torznab_items, body
+    )
+    return (
+        items,
+        response_headers.get("ETag"),
+        response_headers.get("Last-Modified"),
+    )
+
+
+def parse_torznab_items(body):
+    """Parse the items of a Torznab RSS feed into Jackett-style result dicts."""
+    items = []
+    for item in ElementTree.fromstring(body).iter("item"):
+        attrs = {
+            attr.get("name"): attr.get("value")
+            for attr in item.iter(f"{TORZNAB_NAMESPACE}attr")
+        }
+        enclosure = item.find("enclosure")
+        items.append(
+            {
+                "Title": item.findtext("title"),
+                "Guid": item.findtext("guid"),
+                "Link": item.findtext("link")
+                or (enclosure.get("url") if enclosure is not None else None),
+                "MagnetUri": attrs.get("magneturl"),
+                "InfoHash": attrs.get("infohash"),
+                "Size": int(item.findtext("size") or attrs.get("size") or 0),
+                "Seeders": int(attrs.get("seeders") or 0),
+            }
+        )
+    return items
+
+
+async def fetch_configured_indexers():
+    """Get {id -> name} of the indexers configured in Jackett."""
+    params = [
+        ("apikey", get_jackett_token()),
+        ("t", "indexers"),
+        ("configured", "true"),
+    ]
+    url = f"{get_jackett_url()}/api/v2.0/indexers/all/results/torznab/api"
+    timeout = aiohttp.ClientTimeout(total=JACKETT_TIMEOUT)
+
+    async with aiohttp.ClientSession(timeout=timeout) as session:
+        async with session.get(url, params=params) as response:
+            response.raise_for_status()
+            body = await response.read()
+    return {
+        indexer.get("id"): indexer.findtext("title") or indexer.get("id")
+        for indexer in ElementTree.fromstring(body).iter("indexer")
+        if indexer.get("id")
+    }
+
+
+async def probe_indexers(context):
+    """Probe the indexers adaptive mode leaves out, so they rejoin once recovered.
+
+    Also refreshes the list of configured indexers, so new ones are searched.
+    """
+    try:
+        indexer_stats.set_configured(await fetch_configured_indexers())
+    except (aiohttp.ClientError, asyncio.TimeoutError, ElementTree.ParseError) as e:
+        logger.warning("Error listing configured indexers: %s", e)
+
+    for indexer_id in indexer_stats.unhealthy_indexers():
+        # Probes take a slot like any search, so they don't crowd out users
+        await search_limiter.acquire()
+        try:
+            data = await _fetch_jackett(
+                [("Query", INDEXER_PROBE_QUERY), ("Tracker[]", indexer_id)]
+            )
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.warning(
+                "Error probing indexer %s: %s",
+                indexer_id,
+                e,
+                extra={"indexer_id": indexer_id},
+            )
+            continue
+        finally:
+            search_limiter.release()
+
+        for indexer in data.get("Indexers") or []:
+            if indexer.get("ID") != indexer_id:
+                continue
+            elapsed_ms = indexer.get("ElapsedTime")
+            recovered = (
+                indexer.get("Status") != INDEXER_STATUS_ERROR
+                and not indexer.get("Error")
+                and (elapsed_ms is None or elapsed_ms <= INDEXER_SLOW_MS)
+            )
+            if recovered:
+                # Start over from a clean history so it's used again right away
+                logger.info(
+                    "Indexer %s recovered.",
+                    indexer_id,
+                    extra={"indexer_id": indexer_id},
+                )
+                indexer_stats.reset(indexer_id)
+            indexer_stats.record({"Indexers": [indexer]}, [])
 
 
 def format_search_results(data):
@@ -51,14 +351,19 @@ def format_search_results(data):
     results = data.get("Results", [])
     results = sorted(results, key=lambda x: x.get("Seeders", 0), reverse=True)
 
+    # Filter out torrents larger than 121GB
+    results = [torrent for torrent in results if torrent["Size"] <= 121474836480]
+
+    return format_results_table(results), results
+
+
+def format_results_table(results):
+    """Format the first ten of a list of Jackett results into a pretty table."""
     table = PrettyTable(
         border=False, header=True, hrules=0, vrules=0, preserve_internal_border=False
     )
     table.field_names = ["No.", "Title", "Size", "Seeds"]
 
-    # Filter out torrents larger than 121GB
-    results = [torrent for torrent in results if torrent["Size"] <= 121474836480]
-
     for i, torrent in enumerate(results[:10]):
         title = "\n".join(textwrap.wrap(torrent["Title"], width=18))
         size = torrent["Size"]
@@ -66,25 +371,54 @@ def format_search_results(data):
         seeders = torrent["Seeders"]
         table.add_row([i + 1, title, size, seeders])
 
-    return str(table), results
+    return str(table)
+
+
+def merge_search_results(*result_lists):
+    """Merge several Jackett result lists, dropping duplicates, by seeders."""
+    merged = {}
+    for results in result_lists:
+        for torrent in results or ():
+            key = (
+                (torrent.get("InfoHash") or "").lower()
+                or torrent.get("MagnetUri")
+                or torrent.get("Link")
+                or torrent.get("Title")
+            )
+            # Keep the copy with the most seeders
+            if key not in merged or torrent.get("Seeders", 0) > merged[key].get(
+                "Seeders", 0
+            ):
+                merged[key] = torrent
+    return sorted(merged.values(), key=lambda x: x.get("Seeders", 0), reverse=True)
 
 
 def get_torrent_link(index, results):
-    """Get the magnet link or direct link for a torrent."""
+    """Get the magnet link or direct link for a stored search result."""
     if 0 <= index < len(results):
-        torrent = results[index]
-        return torrent.get("MagnetUri") or torrent.get("Link")
+        return results[index].link
     else:
         raise IndexError("Invalid torrent index")
 
 
 # This function is a helper for commands.py to download a torrent file
-async def download_torrent_file(url):
-    """Download a torrent file asynchronously."""
+async def download_torrent_file(url, max_size=MAX_TORRENT_FILE_SIZE):
+    """Download a torrent file asynchronously, refusing payloads over max_size."""
     try:
         async with aiohttp.ClientSession() as session:
             async with session.get(url) as response:
                 response.raise_for_status()
-                return await response.read()
+                if response.content_length and response.content_length > max_size:
+                    raise ValueError(
+                        f"Torrent file is too large ({response.content_length} bytes)"
+                    )
+                data = bytearray()
+                async for chunk in response.content.iter_chunked(64 * 1024):
+                    data.extend(chunk)
+                    if len(data) > max_size:
+                        raise ValueError(
+                            f"Torrent file is too large (over {max_size} bytes)"
+                        )
+                return bytes(data)
     except aiohttp.ClientError as e:
         raise ValueError(f"Failed to download torrent file: {e}")
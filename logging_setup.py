@@ -0,0 +1,125 @@
+import copy
+import json
+import time
+import atexit
+import logging
+import threading
+from queue import SimpleQueue
+from logging.handlers import QueueHandler, QueueListener
+from config import LOG_LEVEL, LOG_FORMAT, LOG_RATE_LIMIT
+
+# Attributes every LogRecord has; anything else came in through extra=
+RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+
+class TextFormatter(logging.Formatter):
+    """Format a record as one line of text, noting suppressed repeats."""
+
+    def format(self, record):
+        text = super().format(record)
+        if getattr(record, "suppressed", 0):
+            text += f" ({record.suppressed} similar messages suppressed)"
+        return text
+
+
+class JsonFormatter(logging.Formatter):
+    """Format a record as one JSON object per line."""
+
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        # Structured fields passed with extra=
+        for key, value in vars(record).items():
+            if key not in RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_text:
+            entry["exc_info"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class RateLimitFilter(logging.Filter):
+    """Let a repeated warning or error through at most once per interval.
+
+    Records are repeats if they come from the same logger with the same
+    message; the next one let through carries how many were suppressed.
+    """
+
+    def __init__(self, interval=LOG_RATE_LIMIT, level=logging.WARNING):
+        super().__init__()
+        self.interval = interval
+        self.level = level
+        self.lock = threading.Lock()
+        self.seen = {}  # Maps (logger, message) -> [last emitted, suppressed count]
+
+    def filter(self, record):
+        if record.levelno < self.level or self.interval <= 0:
+            return True
+
+        key = (record.name, record.getMessage())
+        now = time.monotonic()
+        with self.lock:
+            entry = self.seen.get(key)
+            if entry is not None and now - entry[0] < self.interval:
+                entry[1] += 1
+                return False
+            if entry is not None and entry[1]:
+                record.suppressed = entry[1]
+            self.seen[key] = [now, 0]
+
+            # Forget messages that haven't repeated for a while
+            if len(self.seen) > 1000:
+                for old_key, (emitted, _) in list(self.seen.items()):
+                    if now - emitted >= self.interval:
+                        del self.seen[old_key]
+        return True
+
+
+class StructuredQueueHandler(QueueHandler):
+    """Queue records with their message rendered but their fields kept apart.
+
+    The stock QueueHandler merges the traceback into the message, which
+    would hide it from the JSON output's exc_info field.
+    """
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def setup_logging():
+    """Send all logging through a queue so the event loop never blocks on output.
+
+    Records are formatted and written by a QueueListener thread.
+    """
+    output = logging.StreamHandler()
+    if LOG_FORMAT == "json":
+        output.setFormatter(JsonFormatter())
+    else:
+        output.setFormatter(
+            TextFormatter("%(asctime)s %(levelname)s %(name)s: %(message)s")
+        )
+
+    log_queue = SimpleQueue()
+    queue_handler = StructuredQueueHandler(log_queue)
+    # Filter before enqueueing, so suppressed repeats cost nothing downstream
+    queue_handler.addFilter(RateLimitFilter())
+
+    root = logging.getLogger()
+    root.handlers[:] = [queue_handler]
+    root.setLevel(LOG_LEVEL)
+    # httpx logs every Telegram API request at INFO
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    listener = QueueListener(log_queue, output, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
@@ -0,0 +1,169 @@
+import os
+import sys
+import time
+import asyncio
+import logging
+import threading
+import traceback
+from collections import Counter, deque
+from config import LOOP_LAG_THRESHOLD_MS
+
+logger = logging.getLogger(__name__)
+
+# Directory of the bot's modules, to tell our frames from library frames
+BOT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Seconds between heartbeats on the event loop
+HEARTBEAT_INTERVAL = 0.1
+
+
+def stall_site(frame):
+    """Name the bot handler and the innermost bot function in a stack.
+
+    The handler is the outermost bot function of the running task or
+    callback, skipping decorator wrappers.
+    """
+    handler = None
+    site = None
+    while frame is not None:
+        code = frame.f_code
+        # Frames below the event loop's callback runner belong to the loop itself
+        if code is asyncio.events.Handle._run.__code__:
+            break
+        if code.co_filename.startswith(BOT_DIR):
+            name = f"{os.path.basename(code.co_filename)[:-3]}.{code.co_name}"
+            if site is None:
+                site = name
+            if code.co_name != "wrapper":
+                handler = name
+        frame = frame.f_back
+    return handler or "(library code)", site
+
+
+class LoopWatchdog:
+    """Measure event loop scheduling lag and catch what blocks the loop.
+
+    A heartbeat task records when the loop last ran; a thread notices when it
+    stops beating for longer than the threshold and captures the loop
+    thread's stack while the blocking code is still running.
+    """
+
+    def __init__(self, threshold_ms=LOOP_LAG_THRESHOLD_MS):
+        self.threshold = threshold_ms / 1000
+        self.lock = threading.Lock()
+        self.last_beat = None
+        self.loop_thread_id = None
+        self.pending = None  # Stall captured by the thread, awaiting its duration
+        self.stalls_by_handler = Counter()
+        self.recent_stalls = deque(maxlen=10)
+        self.max_lag = 0.0
+        self.heartbeat_task = None
+        self.thread = None
+        self.running = False
+
+    def start(self):
+        """Start watching the running event loop."""
+        if self.running:
+            return
+        self.running = True
+        self.loop_thread_id = threading.get_ident()
+        self.last_beat = time.monotonic()
+        self.heartbeat_task = asyncio.get_running_loop().create_task(self._heartbeat())
+        self.thread = threading.Thread(
+            target=self._watch, name="loop-watchdog", daemon=True
+        )
+        self.thread.start()
+        logger.info(
+            "Loop watchdog started with a %.0f ms threshold.", self.threshold * 1000
+        )
+
+    async def stop(self):
+        """Stop watching."""
+        if not self.running:
+            return
+        self.running = False
+        self.heartbeat_task.cancel()
+        try:
+            await self.heartbeat_task
+        except asyncio.CancelledError:
+            pass
+        self.thread.join()
+
+    async def _heartbeat(self):
+        """Beat every HEARTBEAT_INTERVAL and measure how late each beat is."""
+        while True:
+            expected = time.monotonic() + HEARTBEAT_INTERVAL
+            await asyncio.sleep(HEARTBEAT_INTERVAL)
+            now = time.monotonic()
+            lag = now - expected
+            with self.lock:
+                self.last_beat = now
+                pending, self.pending = self.pending, None
+            self.max_lag = max(self.max_lag, lag)
+            if lag >= self.threshold:
+                self._record_stall(lag, pending)
+
+    def _watch(self):
+        """Capture the loop thread's stack when the heartbeat stops (runs in a thread)."""
+        while self.running:
+            time.sleep(self.threshold / 2)
+            with self.lock:
+                if self.pending is not None:
+                    continue
+                if time.monotonic() - self.last_beat < self.threshold:
+                    continue
+                frame = sys._current_frames().get(self.loop_thread_id)
+                if frame is None:
+                    continue
+                handler, site = stall_site(frame)
+                self.pending = {
+                    "handler": handler,
+                    "site": site,
+                    "stack": "".join(traceback.format_stack(frame)[-8:]),
+                }
+
+    def _record_stall(self, lag, pending):
+        """Count a stall against the handler that was running during it."""
+        if pending is None:
+            # Shorter than the thread's check interval, so nothing was captured
+            pending = {"handler": "(not captured)", "site": None, "stack": ""}
+        self.stalls_by_handler[pending["handler"]] += 1
+        self.recent_stalls.append(dict(pending, lag=lag, time=time.time()))
+        logger.warning(
+            "Event loop blocked for %.0f ms in %s (at %s)\n%s",
+            lag * 1000,
+            pending["handler"],
+            pending["site"],
+            pending["stack"],
+            extra={"lag_ms": round(lag * 1000), "handler": pending["handler"]},
+        )
+
+    def format_report(self, executors=None):
+        """Format the stall statistics for the admin command."""
+        lines = [
+            f"Threshold {self.threshold * 1000:.0f} ms · max lag {self.max_lag * 1000:.0f} ms"
+        ]
+        if executors:
+            # Work waiting for an RPC thread points at executor saturation
+            queued = ", ".join(
+                f"{level} {executor._work_queue.qsize()}"
+                for level, executor in executors.items()
+            )
+            lines.append(f"Queued RPCs: {queued}")
+
+        if not self.stalls_by_handler:
+            lines.append("No stalls recorded.")
+            return "\n".join(lines)
+
+        lines.append("")
+        lines.append("Stalls by handler:")
+        for handler, count in self.stalls_by_handler.most_common():
+            lines.append(f"  {handler}: {count}")
+
+        lines.append("")
+        lines.append("Recent stalls:")
+        for stall in reversed(self.recent_stalls):
+            lines.append(
+                f"  {stall['lag'] * 1000:.0f} ms in {stall['handler']} (at {stall['site']})"
+            )
+        return "\n".join(lines)
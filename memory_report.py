@@ -0,0 +1,106 @@
+import asyncio
+import resource
+import tracemalloc
+from message_formatting import human_readable_size
+
+# Stack frames kept per traced allocation; one is enough to name the line
+TRACE_FRAMES = 1
+
+# Allocations by the tracing machinery itself aren't worth reporting
+SNAPSHOT_FILTERS = [
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+]
+
+
+def format_stat(stat, growth=False):
+    """Format one tracemalloc statistic as a report line."""
+    frame = stat.traceback[0]
+    site = f"{frame.filename.rsplit('/', 1)[-1]}:{frame.lineno}"
+    if growth:
+        return f"  +{human_readable_size(stat.size_diff)} ({stat.count_diff:+d} blocks) {site}"
+    return f"  {human_readable_size(stat.size)} ({stat.count} blocks) {site}"
+
+
+class MemoryProfiler:
+    """Opt-in tracemalloc tracing with growth between successive reports."""
+
+    def __init__(self):
+        self.previous = None  # Snapshot taken by the last report
+
+    @property
+    def tracing(self):
+        return tracemalloc.is_tracing()
+
+    def start(self):
+        """Start tracing allocations; this slows allocations down noticeably."""
+        if not self.tracing:
+            tracemalloc.start(TRACE_FRAMES)
+        self.previous = None
+
+    def stop(self):
+        """Stop tracing and drop the kept snapshot."""
+        tracemalloc.stop()
+        self.previous = None
+
+    def _analyze(self, previous, limit):
+        """Take a filtered snapshot and rank its allocation sites (runs in a thread).
+
+        Returns the snapshot, the top sites and the sites that grew since the
+        previous snapshot, or None for growth without one.
+        """
+        snapshot = tracemalloc.take_snapshot().filter_traces(SNAPSHOT_FILTERS)
+        top = snapshot.statistics("lineno")[:limit]
+        growth = None
+        if previous is not None:
+            growth = [
+                stat
+                for stat in snapshot.compare_to(previous, "lineno")
+                if stat.size_diff > 0
+            ][:limit]
+        return snapshot, top, growth
+
+    async def report(self, limit=10):
+        """Report the top allocation sites and the growth since the last report."""
+        peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+        lines = [f"Peak RSS: {human_readable_size(peak_rss)}"]
+        if not self.tracing:
+            lines.append("Allocation tracing is off; use /memory on to start it.")
+            return "\n".join(lines)
+
+        # Snapshots of a large heap and their statistics take a while, so keep
+        # them off the event loop
+        snapshot, top, growth = await asyncio.get_running_loop().run_in_executor(
+            None, self._analyze, self.previous, limit
+        )
+        current, peak = tracemalloc.get_traced_memory()
+        lines.append(
+            f"Traced: {human_readable_size(current)} (peak {human_readable_size(peak)})"
+        )
+
+        lines.append("")
+        lines.append("Top allocation sites:")
+        lines.extend(format_stat(stat) for stat in top)
+
+        if growth is not None:
+            lines.append("")
+            lines.append("Growth since the last report:")
+            lines.extend(format_stat(stat, growth=True) for stat in growth)
+            if not growth:
+                lines.append("  None")
+        self.previous = snapshot
+        return "\n".join(lines)
+
+
+def format_structure_sizes(sizes, per_chat_results):
+    """Format the sizes of the bot's own structures."""
+    lines = ["Bot structures:"]
+    lines.extend(f"  {name}: {size}" for name, size in sizes.items())
+    if per_chat_results:
+        lines.append("Stored search results per chat:")
+        for chat_id, count in sorted(
+            per_chat_results.items(), key=lambda item: item[1], reverse=True
+        )[:10]:
+            lines.append(f"  {chat_id}: {count}")
+    return "\n".join(lines)
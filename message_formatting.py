@@ -1,7 +1,12 @@
 from datetime import datetime
+import html
 import pytz
 import urllib.parse
-from config import DOWNLOAD_LINK_PREFIX
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup
+from config import DOWNLOAD_LINK_PREFIX, TIMEZONE
+
+# Resolved once; looking up a pytz timezone on every render is not free
+LOCAL_TIMEZONE = pytz.timezone(TIMEZONE)
 
 
 def human_readable_size(size, decimal_places=2):
@@ -15,10 +20,7 @@ def human_readable_size(size, decimal_places=2):
 
 def format_date(date):
     """Convert UTC date to local timezone and format it."""
-    local_timezone = pytz.timezone(
-        "America/New_York"
-    )  # Consider making this configurable
-    local_date = date.replace(tzinfo=pytz.utc).astimezone(local_timezone)
+    local_date = date.replace(tzinfo=pytz.utc).astimezone(LOCAL_TIMEZONE)
     return local_date.strftime("%b %d %Y, %I:%M %p")
 
 
@@ -67,6 +69,131 @@ def format_torrent_message(torrent, free_space):
         )
 
 
+def file_download_link(file_name):
+    """Get the DOWNLOAD_LINK_PREFIX link of a file of a completed torrent."""
+    return f"{DOWNLOAD_LINK_PREFIX}/{urllib.parse.quote(file_name)}"
+
+
+def format_file_list(name, files, max_length=4000):
+    """Format a torrent's files as HTML, linking each one once it's downloaded."""
+    lines = [f"<b>Files of {html.escape(name)}</b> ({len(files)})"]
+    length = len(lines[0])
+    for shown, (file_name, size, completed) in enumerate(files):
+        label = html.escape(file_name.split("/")[-1])
+        if DOWNLOAD_LINK_PREFIX and size and completed >= size:
+            entry = (
+                f'<a href="{html.escape(file_download_link(file_name))}">{label}</a>'
+            )
+        else:
+            entry = label
+        progress = (
+            f", {completed / size * 100:.0f}%" if size and completed < size else ""
+        )
+        line = f"• {entry} ({human_readable_size(size)}{progress})"
+        # Keep room for the line saying how many files were left out
+        if length + len(line) + 40 > max_length:
+            lines.append(f"... and {len(files) - shown} more files")
+            break
+        lines.append(line)
+        length += len(line) + 1
+    return "\n".join(lines)
+
+
+def format_peer_list(name, peers, max_peers=30):
+    """Format a torrent's connected peers as HTML."""
+    lines = [f"<b>Peers of {html.escape(name)}</b> ({len(peers)})"]
+    peers = sorted(peers, key=lambda peer: peer.get("rateToClient", 0), reverse=True)
+    for peer in peers[:max_peers]:
+        lines.append(
+            f"• {html.escape(peer.get('address', '?'))} "
+            f"{html.escape(peer.get('clientName') or '')} · "
+            f"{peer.get('progress', 0) * 100:.0f}% · "
+            f"↓ {human_readable_size(peer.get('rateToClient', 0))}/s "
+            f"↑ {human_readable_size(peer.get('rateToPeer', 0))}/s"
+        )
+    if len(peers) > max_peers:
+        lines.append(f"... and {len(peers) - max_peers} more peers")
+    if not peers:
+        lines.append("No connected peers.")
+    return "\n".join(lines)
+
+
+def format_tracker_list(name, tracker_stats):
+    """Format a torrent's trackers and their last announce as HTML."""
+    lines = [f"<b>Trackers of {html.escape(name)}</b> ({len(tracker_stats)})"]
+    for tracker in tracker_stats:
+        result = tracker.last_announce_result or "not announced yet"
+        lines.append(
+            f"• {html.escape(tracker.host)} · seeders {tracker.seeder_count} · "
+            f"leechers {tracker.leecher_count} · {html.escape(result)}"
+        )
+    if not tracker_stats:
+        lines.append("No trackers.")
+    return "\n".join(lines)
+
+
+def format_dashboard(torrents, free_space, max_length=4000):
+    """Format a compact summary of several torrents for a single dashboard message."""
+    lines = [
+        f"📊 Dashboard - {len(torrents)} tracked torrent{'s' if len(torrents) != 1 else ''}"
+    ]
+    if not torrents:
+        lines.append("\nNo torrents are being tracked in this chat.")
+
+    footer = f"\nFree Disk Space = {human_readable_size(free_space)}"
+    length = len(lines[0]) + len(footer)
+
+    for shown, torrent in enumerate(torrents):
+        progress_percent = torrent.percent_done * 100
+        filled_length = int(10 * progress_percent // 100)
+        bar = "█" * filled_length + "-" * (10 - filled_length)
+        name = torrent.name[:40] + "..." if len(torrent.name) > 40 else torrent.name
+        if torrent.percent_done < 1:
+            eta = torrent.eta if torrent.eta is not None else "-"
+            details = f"↓ {human_readable_size(torrent.rate_download)}/s · ETA {eta}"
+        else:
+            details = "Done"
+        entry = (
+            f"\n{torrent.id}. {name}\n"
+            f"[{bar}] {progress_percent:.1f}% · {details} · "
+            f"{human_readable_size(torrent.total_size)}"
+        )
+
+        # Stay within Telegram's message size limit
+        if length + len(entry) > max_length:
+            lines.append(f"\n... and {len(torrents) - shown} more")
+            break
+        lines.append(entry)
+        length += len(entry)
+
+    lines.append(footer)
+    return "\n".join(lines)
+
+
+def format_metainfo_summary(info):
+    """Format the parsed metainfo of a .torrent file."""
+    return (
+        f"Name: {info['name']}\n"
+        f"Size: {human_readable_size(info['size'])}\n"
+        f"Files: {info['file_count']}\n"
+        f"Infohash: {info['infohash']}"
+    )
+
+
+def format_added_torrent(torrent_id, name, infohash, metainfo=None):
+    """Format the immediate reply to an added torrent, before its details are known.
+
+    The parsed metainfo of a .torrent file adds its size and file count.
+    """
+    text = f"Torrent added to Transmission: {name} (ID: {torrent_id})\n"
+    if metainfo is not None:
+        text += (
+            f"Size: {human_readable_size(metainfo['size'])}\n"
+            f"Files: {metainfo['file_count']}\n"
+        )
+    return text + f"Infohash: {infohash}\nFetching details..."
+
+
 def format_torrent_list(torrents, free_space, chunk_size=10):
     """Format a list of torrents into message chunks for display."""
     if not torrents:
@@ -98,3 +225,22 @@ def format_torrent_list(torrents, free_space, chunk_size=10):
         messages.append(response_message)
 
     return messages
+
+
+def info_keyboard(torrent_id):
+    """Buttons that expand an /info message into its detail tiers."""
+    return InlineKeyboardMarkup(
+        [
+            [
+                InlineKeyboardButton(
+                    "📁 Files", callback_data=f"info:files:{torrent_id}"
+                ),
+                InlineKeyboardButton(
+                    "👥 Peers", callback_data=f"info:peers:{torrent_id}"
+                ),
+                InlineKeyboardButton(
+                    "📡 Trackers", callback_data=f"info:trackers:{torrent_id}"
+                ),
+            ]
+        ]
+    )
@@ -0,0 +1,75 @@
+import io
+import base64
+import asyncio
+from urllib.parse import urlparse, parse_qs
+from concurrent.futures import ProcessPoolExecutor
+from torf import Torrent, TorfError
+from config import MAX_TORRENT_FILE_SIZE, METAINFO_WORKERS
+
+# Process pool for bencode decoding and info hashing, created on first use
+process_pool = None
+
+
+def get_process_pool():
+    """Get the process pool used for metainfo parsing."""
+    global process_pool
+    if process_pool is None:
+        process_pool = ProcessPoolExecutor(max_workers=METAINFO_WORKERS)
+    return process_pool
+
+
+def _parse_metainfo_sync(data):
+    """Decode a .torrent payload with torf (runs in a worker process)."""
+    try:
+        torrent = Torrent.read_stream(io.BytesIO(data), validate=True)
+        return {
+            "name": torrent.name,
+            "size": torrent.size,
+            "file_count": len(torrent.files),
+            "infohash": torrent.infohash.lower(),
+        }
+    except TorfError as e:
+        # torf exceptions don't always survive pickling, so send back a plain error
+        raise ValueError(f"Invalid torrent file: {e}") from None
+
+
+async def parse_torrent_metainfo(data):
+    """Parse a .torrent payload off the event loop and return its summary."""
+    if not data:
+        raise ValueError("Invalid torrent file: empty payload")
+    if len(data) > MAX_TORRENT_FILE_SIZE:
+        raise ValueError(
+            f"Torrent file is too large ({len(data)} bytes, limit is {MAX_TORRENT_FILE_SIZE})"
+        )
+    # Every bencoded metainfo file is a dictionary
+    if not bytes(data[:1]) == b"d":
+        raise ValueError("Invalid torrent file: not a bencoded dictionary")
+
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        get_process_pool(), _parse_metainfo_sync, bytes(data)
+    )
+
+
+def magnet_infohash(link):
+    """Extract the lowercase hex btih infohash from a magnet link, if present."""
+    params = parse_qs(urlparse(link).query)
+    for xt in params.get("xt", []):
+        if not xt.lower().startswith("urn:btih:"):
+            continue
+        value = xt[len("urn:btih:") :]
+        if len(value) == 40:
+            return value.lower()
+        if len(value) == 32:
+            # Base32-encoded infohash
+            try:
+                return base64.b32decode(value.upper()).hex()
+            except ValueError:
+                return None
+    return None
+
+
+def magnet_name(link):
+    """Get the display name (dn) of a magnet link, if present."""
+    names = parse_qs(urlparse(link).query).get("dn")
+    return names[0] if names else None
@@ -0,0 +1,459 @@
+import asyncio
+import hashlib
+import logging
+from telegram.ext import CallbackContext
+from telegram.error import BadRequest
+from config import DATA_DIR, MONITOR_INTERVAL
+from torrent_manager import with_priority, PRIORITY_MONITOR
+from message_formatting import format_torrent_message, format_dashboard, info_keyboard
+
+logger = logging.getLogger(__name__)
+
+
+def text_digest(text):
+    """Get a short digest of a message text."""
+    return hashlib.blake2b(text.encode(), digest_size=8).digest()
+
+
+class SubscriptionRegistry:
+    """Which chats follow which torrents, indexed by torrent and by chat.
+
+    Also holds which chats use a dashboard. shared_store has a SQLite
+    version with the same methods for running several replicas, which is
+    why they are coroutines.
+    """
+
+    def __init__(self):
+        self.by_torrent = {}  # Maps torrent_id -> {chat_id -> message_id}
+        self.by_chat = {}  # Maps chat_id -> set of torrent_ids
+        self.dashboard_messages = {}  # Maps chat_id -> message_id of its dashboard
+        self.keyboards = set()  # (torrent_id, chat_id) whose message has /info buttons
+
+    async def has_subscriptions(self):
+        """Tell whether any chat follows any torrent."""
+        return bool(self.by_torrent)
+
+    async def subscribe(self, torrent_id, chat_id, message_id, keyboard=False):
+        """Follow a torrent in a chat, replacing any earlier message for it.
+
+        keyboard records whether the message has the /info buttons.
+        """
+        self.by_torrent.setdefault(torrent_id, {})[chat_id] = message_id
+        self.by_chat.setdefault(chat_id, set()).add(torrent_id)
+        if keyboard:
+            self.keyboards.add((torrent_id, chat_id))
+        else:
+            self.keyboards.discard((torrent_id, chat_id))
+
+    async def unsubscribe(self, torrent_id, chat_id):
+        """Stop following a torrent in a chat and return its message id."""
+        chats = self.by_torrent.get(torrent_id, {})
+        message_id = chats.pop(chat_id, None)
+        self.keyboards.discard((torrent_id, chat_id))
+        if not chats:
+            self.by_torrent.pop(torrent_id, None)
+        torrent_ids = self.by_chat.get(chat_id, set())
+        torrent_ids.discard(torrent_id)
+        if not torrent_ids:
+            self.by_chat.pop(chat_id, None)
+        return message_id
+
+    async def remove_torrent(self, torrent_id):
+        """Drop every subscription to a torrent and return {chat_id -> message_id}."""
+        chats = dict(self.by_torrent.get(torrent_id, {}))
+        for chat_id in chats:
+            await self.unsubscribe(torrent_id, chat_id)
+        return chats
+
+    async def torrent_ids(self):
+        """Get the ids of all followed torrents."""
+        return list(self.by_torrent)
+
+    async def chats_for(self, torrent_id):
+        """Get {chat_id -> message_id} for the chats following a torrent."""
+        return dict(self.by_torrent.get(torrent_id, {}))
+
+    async def keyboard_chats(self, torrent_id):
+        """Get the ids of the chats whose message about a torrent has /info buttons."""
+        return {
+            chat_id
+            for chat_id in self.by_torrent.get(torrent_id, {})
+            if (torrent_id, chat_id) in self.keyboards
+        }
+
+    async def torrents_for(self, chat_id):
+        """Get the ids of the torrents a chat follows."""
+        return set(self.by_chat.get(chat_id, set()))
+
+    async def set_dashboard(self, chat_id, message_id):
+        """Use message_id as the chat's dashboard."""
+        self.dashboard_messages[chat_id] = message_id
+
+    async def remove_dashboard(self, chat_id):
+        """Stop using a dashboard in the chat and return its message id, if any."""
+        return self.dashboard_messages.pop(chat_id, None)
+
+    async def dashboards(self):
+        """Get {chat_id -> message_id} of the chats using a dashboard."""
+        return dict(self.dashboard_messages)
+
+
+class TorrentMonitor:
+    """The single engine that polls tracked torrents and keeps their messages current."""
+
+    def __init__(
+        self, torrent_manager, interval=MONITOR_INTERVAL, registry=None, election=None
+    ):
+        self.torrent_manager = torrent_manager
+        self.interval = interval
+        self.registry = registry if registry is not None else SubscriptionRegistry()
+        # With an election, only the replica that wins it runs the monitoring job
+        self.election = election
+        self.leader = election is None
+        self.last_progress = {}  # Maps torrent_id -> progress percentage last shown
+        # Maps (chat_id, message_id) -> digest of the last text
+        self.message_digests = {}
+
+    # Message bookkeeping
+
+    async def edit_message(self, bot, chat_id, message_id, text, reply_markup=None):
+        """Edit a tracking message, skipping the request if it already shows text.
+
+        reply_markup is the inline keyboard to keep on the message. Returns
+        True if the message was edited.
+        """
+        key = (chat_id, message_id)
+        digest = text_digest(text)
+        if self.message_digests.get(key) == digest:
+            return False
+        try:
+            await bot.edit_message_text(
+                chat_id=chat_id,
+                message_id=message_id,
+                text=text,
+                reply_markup=reply_markup,
+            )
+        except BadRequest as e:
+            if "Message is not modified" not in str(e):
+                raise
+        self.message_digests[key] = digest
+        return True
+
+    @staticmethod
+    def _markup(torrent_id, chat_id, keyboard_chats):
+        """Get the inline keyboard a chat's message about a torrent keeps."""
+        return info_keyboard(torrent_id) if chat_id in keyboard_chats else None
+
+    def remember_message(self, chat_id, message_id, text):
+        """Record the text a tracking message was sent with."""
+        self.message_digests[(chat_id, message_id)] = text_digest(text)
+
+    def forget_message(self, chat_id, message_id):
+        """Drop the recorded text of a message that is no longer tracked."""
+        self.message_digests.pop((chat_id, message_id), None)
+
+    # Subscriptions
+
+    async def track(
+        self,
+        job_queue,
+        chat_id,
+        torrent_id,
+        message_id,
+        text=None,
+        progress=None,
+        keyboard=False,
+    ):
+        """Follow a torrent in a chat through the given message.
+
+        text is what the message currently shows, and progress the percentage
+        it shows, if known; otherwise the message is refreshed on the next tick.
+        keyboard tells whether the message has the /info buttons, which are
+        rebuilt from the torrent id whenever it is edited.
+        """
+        previous_message_id = (await self.registry.chats_for(torrent_id)).get(chat_id)
+        if previous_message_id is not None and previous_message_id != message_id:
+            self.forget_message(chat_id, previous_message_id)
+
+        await self.registry.subscribe(torrent_id, chat_id, message_id, keyboard)
+        if text is not None:
+            self.remember_message(chat_id, message_id, text)
+        if progress is None:
+            self.last_progress.pop(torrent_id, None)
+        else:
+            self.last_progress[torrent_id] = progress
+        await self.start(job_queue)
+
+    async def untrack_torrent(self, torrent_id):
+        """Stop following a torrent in every chat, e.g. after it was deleted."""
+        chats = await self.registry.remove_torrent(torrent_id)
+        for chat_id, message_id in chats.items():
+            self.forget_message(chat_id, message_id)
+        self.last_progress.pop(torrent_id, None)
+
+    async def _untrack(self, torrent_id, chat_id):
+        """Stop following a torrent in one chat."""
+        message_id = await self.registry.unsubscribe(torrent_id, chat_id)
+        if message_id is not None:
+            self.forget_message(chat_id, message_id)
+        if not await self.registry.chats_for(torrent_id):
+            self.last_progress.pop(torrent_id, None)
+
+    # Scheduling
+
+    async def start(self, job_queue):
+        """Start the monitoring loop if it's not already running."""
+        if not self.leader or not await self.registry.has_subscriptions():
+            return
+        if not job_queue.get_jobs_by_name("monitor"):
+            logger.info("Starting torrent monitoring.")
+            job_queue.run_repeating(
+                self.check, interval=self.interval, first=0, name="monitor"
+            )
+
+    def stop(self, job_queue):
+        """Stop the monitoring loop."""
+        for job in job_queue.get_jobs_by_name("monitor"):
+            job.schedule_removal()
+
+    async def elect(self, context: CallbackContext):
+        """Take part in the leader election and run the monitor only while leading."""
+        leader = self.election.try_lead()
+        if leader != self.leader:
+            logger.info(
+                "This replica %s the monitor leader.",
+                "is now" if leader else "is no longer",
+            )
+            # A new leader has no record of what messages show
+            self.last_progress.clear()
+            self.message_digests.clear()
+        self.leader = leader
+        if leader:
+            await self.start(context.job_queue)
+        else:
+            self.stop(context.job_queue)
+
+    @with_priority(PRIORITY_MONITOR)
+    async def check(self, context: CallbackContext):
+        """Poll every tracked torrent once and update its messages and dashboards."""
+        try:
+            # If no torrents are being tracked, stop the job
+            if not await self.registry.has_subscriptions():
+                logger.info("No torrents being tracked. Stopping monitoring job.")
+                self.stop(context.job_queue)
+                return
+            if not self.leader:
+                self.stop(context.job_queue)
+                return
+
+            # Every message shows the same free space, so fetch it once per tick
+            free_space = await self.torrent_manager.get_free_space(DATA_DIR)
+
+            # Snapshot each dashboard's torrents before completed ones are dropped
+            dashboards = await self.registry.dashboards()
+            dashboard_torrents = {
+                chat_id: await self.registry.torrents_for(chat_id)
+                for chat_id in dashboards
+            }
+
+            # Concurrent gets are merged into one RPC by the torrent manager
+            torrent_ids = await self.registry.torrent_ids()
+            fetched = await asyncio.gather(
+                *(
+                    self.torrent_manager.get_torrent(torrent_id)
+                    for torrent_id in torrent_ids
+                ),
+                return_exceptions=True,
+            )
+
+            torrents = {}
+            for torrent_id, torrent in zip(torrent_ids, fetched):
+                if isinstance(torrent, KeyError):
+                    await self._drop_missing(context.bot, torrent_id)
+                elif isinstance(torrent, Exception):
+                    # Transient errors shouldn't cost the user their tracking
+                    logger.warning(
+                        "Error getting torrent %s: %s",
+                        torrent_id,
+                        torrent,
+                        extra={"torrent_id": torrent_id},
+                    )
+                else:
+                    torrents[torrent_id] = torrent
+                    await self._update_torrent(
+                        context.bot, torrent, free_space, dashboards
+                    )
+
+            # Edit each dashboard at most once per tick
+            for chat_id, chat_torrent_ids in dashboard_torrents.items():
+                chat_torrents = [
+                    torrents[torrent_id]
+                    for torrent_id in sorted(chat_torrent_ids)
+                    if torrent_id in torrents
+                ]
+                await self.update_dashboard(
+                    context.bot, chat_id, chat_torrents, free_space
+                )
+
+        except Exception as global_error:
+            logger.exception("Error in torrent monitor: %s", global_error)
+            # Don't stop monitoring due to a transient error
+
+    async def _update_torrent(self, bot, torrent, free_space, dashboards):
+        """Refresh the messages of one torrent and stop tracking it once complete."""
+        torrent_id = torrent.id
+        progress = torrent.percent_done * 100
+
+        # Only update if progress has changed by at least 0.5%
+        previous_progress = self.last_progress.get(torrent_id, -1)
+        if abs(progress - previous_progress) < 0.5:
+            # A torrent tracked when already complete has nothing left to show
+            if progress >= 100:
+                for chat_id in await self.registry.chats_for(torrent_id):
+                    await self._untrack(torrent_id, chat_id)
+            return
+        # Until a magnet's metadata arrives, render again once it does
+        if torrent.metadata_percent_complete < 1:
+            self.last_progress[torrent_id] = -1
+        else:
+            self.last_progress[torrent_id] = progress
+
+        # Render once and reuse the text for every subscribed chat
+        message_text = format_torrent_message(torrent, free_space)
+
+        chats = await self.registry.chats_for(torrent_id)
+        keyboard_chats = await self.registry.keyboard_chats(torrent_id)
+        for chat_id, message_id in chats.items():
+            try:
+                # Dashboard chats see this torrent in their dashboard instead
+                if chat_id not in dashboards:
+                    await self.edit_message(
+                        bot,
+                        chat_id,
+                        message_id,
+                        message_text,
+                        self._markup(torrent_id, chat_id, keyboard_chats),
+                    )
+            except Exception as edit_error:
+                logger.warning(
+                    "Error updating message for torrent %s in chat %s: %s",
+                    torrent_id,
+                    chat_id,
+                    edit_error,
+                    extra={"torrent_id": torrent_id, "chat_id": chat_id},
+                )
+                # Clean up tracking if message update fails
+                try:
+                    await bot.delete_message(chat_id=chat_id, message_id=message_id)
+                except Exception:
+                    pass  # Ignore errors when deleting
+                await self._untrack(torrent_id, chat_id)
+                continue
+
+            # Remove tracking if download is complete
+            if progress >= 100:
+                logger.info(
+                    "Torrent %s complete. Removing from tracking.",
+                    torrent_id,
+                    extra={"torrent_id": torrent_id},
+                )
+                await self._untrack(torrent_id, chat_id)
+
+    async def _drop_missing(self, bot, torrent_id):
+        """Stop tracking a torrent that no longer exists and delete its messages."""
+        logger.info(
+            "Torrent %s no longer exists. Removing from tracking.",
+            torrent_id,
+            extra={"torrent_id": torrent_id},
+        )
+        chats = await self.registry.chats_for(torrent_id)
+        await self.untrack_torrent(torrent_id)
+        for chat_id, message_id in chats.items():
+            try:
+                await bot.delete_message(chat_id=chat_id, message_id=message_id)
+            except Exception:
+                pass
+
+    async def finalize(self, bot, torrent_id, infohash=None):
+        """Finish tracking a torrent that Transmission reported as done."""
+        chats = await self.registry.chats_for(torrent_id)
+        if not chats and infohash:
+            torrent_id = (
+                await self.torrent_manager.find_torrent_id(infohash) or torrent_id
+            )
+            chats = await self.registry.chats_for(torrent_id)
+        if not chats:
+            return
+
+        logger.info(
+            "Torrent %s finished. Finalizing tracking messages.",
+            torrent_id,
+            extra={"torrent_id": torrent_id},
+        )
+        try:
+            torrent = await self.torrent_manager.get_torrent(torrent_id)
+            free_space = await self.torrent_manager.get_free_space(DATA_DIR)
+        except Exception as e:
+            logger.warning(
+                "Error getting finished torrent %s: %s",
+                torrent_id,
+                e,
+                extra={"torrent_id": torrent_id},
+            )
+            return
+
+        message_text = format_torrent_message(torrent, free_space)
+        dashboards = await self.registry.dashboards()
+        keyboard_chats = await self.registry.keyboard_chats(torrent_id)
+        for chat_id, message_id in chats.items():
+            if chat_id not in dashboards:
+                try:
+                    await self.edit_message(
+                        bot,
+                        chat_id,
+                        message_id,
+                        message_text,
+                        self._markup(torrent_id, chat_id, keyboard_chats),
+                    )
+                except BadRequest as e:
+                    logger.warning(
+                        "Error finalizing message for torrent %s: %s",
+                        torrent_id,
+                        e,
+                        extra={"torrent_id": torrent_id},
+                    )
+        await self.untrack_torrent(torrent_id)
+
+    # Dashboards
+
+    async def enable_dashboard(self, chat_id, message_id, text):
+        """Use message_id as the chat's dashboard."""
+        await self.registry.set_dashboard(chat_id, message_id)
+        self.remember_message(chat_id, message_id, text)
+
+    async def disable_dashboard(self, chat_id):
+        """Stop using a dashboard in the chat and return its message id, if any."""
+        message_id = await self.registry.remove_dashboard(chat_id)
+        if message_id is not None:
+            self.forget_message(chat_id, message_id)
+        return message_id
+
+    async def update_dashboard(self, bot, chat_id, torrents, free_space):
+        """Edit a chat's pinned dashboard message with its tracked torrents."""
+        # Read it again, since the dashboard may have been retired meanwhile
+        message_id = (await self.registry.dashboards()).get(chat_id)
+        if message_id is None:
+            return
+        try:
+            await self.edit_message(
+                bot, chat_id, message_id, format_dashboard(torrents, free_space)
+            )
+        except BadRequest as e:
+            # The dashboard was deleted or can't be edited; turn dashboard mode off
+            logger.warning(
+                "Error updating dashboard in chat %s: %s",
+                chat_id,
+                e,
+                extra={"chat_id": chat_id},
+            )
+            await self.disable_dashboard(chat_id)
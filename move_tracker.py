@@ -0,0 +1,146 @@
+import time
+import logging
+from telegram.ext import CallbackContext
+from telegram.error import BadRequest
+from config import MOVE_TIMEOUT
+from torrent_manager import with_priority, PRIORITY_MONITOR
+
+logger = logging.getLogger(__name__)
+
+# Fields needed to follow a relocation
+MOVE_FIELDS = ["name", "downloadDir", "status", "error", "errorString"]
+
+
+def format_elapsed(seconds):
+    """Format a duration in seconds as a short human-readable string."""
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours:
+        return f"{hours}h {minutes}m"
+    if minutes:
+        return f"{minutes}m {seconds}s"
+    return f"{seconds}s"
+
+
+class MoveTracker:
+    """Follow in-flight data moves and report them in one status message per move."""
+
+    def __init__(self, torrent_manager, interval=5):
+        self.torrent_manager = torrent_manager
+        self.interval = interval
+        self.moves = []  # Moves that still have torrents in flight
+
+    async def track(
+        self, context: CallbackContext, chat_id, message_id, target, label, torrents
+    ):
+        """Start following the relocation of torrents to target.
+
+        torrents maps torrent_id -> name. The message identified by chat_id and
+        message_id is edited with progress until every torrent has finished.
+        """
+        move = {
+            "chat_id": chat_id,
+            "message_id": message_id,
+            "target": target.rstrip("/"),
+            "label": label,
+            "started": time.monotonic(),
+            "torrents": {
+                torrent_id: {"name": name, "state": "moving", "detail": ""}
+                for torrent_id, name in torrents.items()
+            },
+            "last_text": None,
+        }
+        # A torrent can only be in one move; a newer one supersedes the old
+        for previous in self.moves:
+            for torrent_id in torrents:
+                entry = previous["torrents"].get(torrent_id)
+                if entry and entry["state"] == "moving":
+                    entry["state"] = "failed"
+                    entry["detail"] = "superseded by a new move"
+        self.moves.append(move)
+
+        if not context.job_queue.get_jobs_by_name("check_moves"):
+            context.job_queue.run_repeating(
+                self.check_moves, interval=self.interval, first=1, name="check_moves"
+            )
+
+    @with_priority(PRIORITY_MONITOR)
+    async def check_moves(self, context: CallbackContext):
+        """Poll every moving torrent in one batched RPC and update the status messages."""
+        if not self.moves:
+            for job in context.job_queue.get_jobs_by_name("check_moves"):
+                job.schedule_removal()
+            return
+
+        moving = {
+            torrent_id: (move, entry)
+            for move in self.moves
+            for torrent_id, entry in move["torrents"].items()
+            if entry["state"] == "moving"
+        }
+        torrents_by_id = {}
+        if moving:
+            try:
+                torrents = await self.torrent_manager.get_torrent_fields(
+                    list(moving), MOVE_FIELDS
+                )
+            except Exception as e:
+                logger.warning("Error polling moving torrents: %s", e)
+                return
+            torrents_by_id = {torrent.id: torrent for torrent in torrents}
+
+        now = time.monotonic()
+        for torrent_id, (move, entry) in moving.items():
+            torrent = torrents_by_id.get(torrent_id)
+            if torrent is None:
+                entry["state"] = "failed"
+                entry["detail"] = "torrent was removed"
+            elif torrent.error:
+                entry["state"] = "failed"
+                entry["detail"] = torrent.error_string
+            elif torrent.download_dir.rstrip("/") == move["target"]:
+                entry["state"] = "done"
+                entry["detail"] = ""
+            elif now - move["started"] > MOVE_TIMEOUT:
+                entry["state"] = "failed"
+                entry["detail"] = "timed out"
+            else:
+                entry["detail"] = torrent.status.value
+
+        for move in list(self.moves):
+            await self._report(context, move, now)
+
+    async def _report(self, context: CallbackContext, move, now):
+        """Edit a move's status message and stop tracking it once it has finished."""
+        entries = move["torrents"]
+        done = sum(1 for entry in entries.values() if entry["state"] == "done")
+        failed = sum(1 for entry in entries.values() if entry["state"] == "failed")
+        finished = done + failed == len(entries)
+        elapsed = format_elapsed(now - move["started"])
+
+        if not finished:
+            header = f"Moving to {move['label']} directory: {done}/{len(entries)} done ({elapsed})"
+        elif failed:
+            header = f"Move to {move['label']} directory finished with {failed} failure{'s' if failed > 1 else ''} ({elapsed})"
+        else:
+            header = f"Moved to {move['label']} directory ({elapsed})"
+
+        lines = [header]
+        for torrent_id, entry in entries.items():
+            icon = {"moving": "⏳", "done": "✅", "failed": "❌"}[entry["state"]]
+            detail = f" - {entry['detail']}" if entry["detail"] else ""
+            lines.append(f"{icon} {entry['name']} (ID: {torrent_id}){detail}")
+        text = "\n".join(lines)
+
+        if text != move["last_text"]:
+            try:
+                await context.bot.edit_message_text(
+                    chat_id=move["chat_id"], message_id=move["message_id"], text=text
+                )
+                move["last_text"] = text
+            except BadRequest as e:
+                if "Message is not modified" not in str(e):
+                    logger.warning("Error updating move status message: %s", e)
+
+        if finished:
+            self.moves.remove(move)
@@ -0,0 +1,151 @@
+import os
+import re
+import time
+import asyncio
+import logging
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from config import RESULT_INDEX_MAX_AGE
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS seen_results (
+    id INTEGER PRIMARY KEY,
+    link TEXT UNIQUE NOT NULL,
+    title TEXT NOT NULL,
+    size INTEGER,
+    seeders INTEGER,
+    categories TEXT,
+    seen REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS seen_results_seen ON seen_results (seen);
+CREATE VIRTUAL TABLE IF NOT EXISTS seen_results_fts USING fts5(
+    title, content='seen_results', content_rowid='id'
+);
+CREATE TRIGGER IF NOT EXISTS seen_results_ai AFTER INSERT ON seen_results BEGIN
+    INSERT INTO seen_results_fts (rowid, title) VALUES (new.id, new.title);
+END;
+CREATE TRIGGER IF NOT EXISTS seen_results_ad AFTER DELETE ON seen_results BEGIN
+    INSERT INTO seen_results_fts (seen_results_fts, rowid, title)
+    VALUES ('delete', old.id, old.title);
+END;
+CREATE TRIGGER IF NOT EXISTS seen_results_au AFTER UPDATE ON seen_results BEGIN
+    INSERT INTO seen_results_fts (seen_results_fts, rowid, title)
+    VALUES ('delete', old.id, old.title);
+    INSERT INTO seen_results_fts (rowid, title) VALUES (new.id, new.title);
+END;
+"""
+
+
+def match_expression(query):
+    """Turn a search query into an FTS5 expression requiring every word."""
+    words = re.findall(r"\w+", query.lower())
+    return " ".join(f'"{word}"' for word in words)
+
+
+def in_categories(result_categories, categories):
+    """Check whether a result's Torznab categories fall under the requested ones."""
+    return any(
+        category in categories or category // 1000 * 1000 in categories
+        for category in result_categories
+    )
+
+
+class ResultIndex:
+    """Full-text index of every Jackett result seen, for instant repeat searches.
+
+    SQLite runs on a single thread of its own, so lookups and writes never
+    block the event loop.
+    """
+
+    def __init__(self, path, max_age=RESULT_INDEX_MAX_AGE):
+        self.path = path
+        self.max_age = max_age
+        self.db = None
+        self.executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="result-index"
+        )
+
+    def _connect(self):
+        """Open the index on first use (runs in the index thread)."""
+        if self.db is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self.db = sqlite3.connect(self.path, check_same_thread=False)
+            self.db.executescript(SCHEMA)
+        return self.db
+
+    def add(self, results):
+        """Index Jackett results in the background."""
+        future = asyncio.get_running_loop().run_in_executor(
+            self.executor, self._add_sync, results
+        )
+        future.add_done_callback(self._log_error)
+
+    def _log_error(self, future):
+        if not future.cancelled() and future.exception() is not None:
+            logger.error("Error indexing search results: %s", future.exception())
+
+    def _add_sync(self, results):
+        """Upsert results and drop ones not seen for max_age (runs in the index thread)."""
+        db = self._connect()
+        now = time.time()
+        rows = []
+        for result in results:
+            link = result.get("MagnetUri") or result.get("Link")
+            if not link or not result.get("Title"):
+                continue
+            categories = " ".join(str(c) for c in result.get("Category") or ())
+            rows.append(
+                (
+                    link,
+                    result["Title"],
+                    result.get("Size"),
+                    result.get("Seeders"),
+                    categories,
+                    now,
+                )
+            )
+        with db:
+            db.executemany(
+                "INSERT INTO seen_results (link, title, size, seeders, categories, seen) "
+                "VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (link) DO UPDATE SET title = excluded.title, "
+                "size = excluded.size, seeders = excluded.seeders, "
+                "categories = excluded.categories, seen = excluded.seen",
+                rows,
+            )
+            db.execute("DELETE FROM seen_results WHERE seen < ?", (now - self.max_age,))
+
+    async def lookup(self, query, categories=None, limit=50):
+        """Get indexed results matching every word of query, by seeders."""
+        return await asyncio.get_running_loop().run_in_executor(
+            self.executor, self._lookup_sync, query, categories, limit
+        )
+
+    def _lookup_sync(self, query, categories, limit):
+        """Query the index (runs in the index thread)."""
+        expression = match_expression(query)
+        if not expression:
+            return []
+        rows = self._connect().execute(
+            "SELECT title, size, seeders, link, categories FROM seen_results "
+            "WHERE id IN (SELECT rowid FROM seen_results_fts WHERE seen_results_fts MATCH ?) "
+            "ORDER BY seeders DESC LIMIT ?",
+            (expression, limit * 4 if categories else limit),
+        )
+        results = []
+        for title, size, seeders, link, result_categories in rows:
+            result_categories = [int(c) for c in result_categories.split()]
+            if categories and not in_categories(result_categories, categories):
+                continue
+            results.append(
+                {
+                    "Title": title,
+                    "Size": size,
+                    "Seeders": seeders,
+                    "Link": link,
+                    "Category": result_categories,
+                }
+            )
+        return results[:limit]
@@ -0,0 +1,88 @@
+import time
+from collections import OrderedDict
+from config import SEARCH_RESULTS_TTL, SEARCH_RESULTS_MAX
+
+
+class SearchResult:
+    """The fields of a Jackett result needed to add it later."""
+
+    __slots__ = ("title", "size", "seeders", "link")
+
+    def __init__(self, title, size, seeders, link):
+        self.title = title
+        self.size = size
+        self.seeders = seeders
+        self.link = link
+
+    @classmethod
+    def from_jackett(cls, result):
+        """Build a compact record from a Jackett result dictionary."""
+        return cls(
+            result.get("Title"),
+            result.get("Size"),
+            result.get("Seeders"),
+            result.get("MagnetUri") or result.get("Link"),
+        )
+
+
+class ResultStore:
+    """Search results keyed by the (chat_id, message_id) of the message showing them.
+
+    Entries expire after ttl seconds, and the least recently used ones are
+    evicted once more than max_results records are stored in total. Methods
+    are coroutines to match the SQLite version in shared_store.
+    """
+
+    def __init__(self, ttl=SEARCH_RESULTS_TTL, max_results=SEARCH_RESULTS_MAX):
+        self.ttl = ttl
+        self.max_results = max_results
+        self.entries = OrderedDict()  # Maps (chat_id, message_id) -> (expiry, records)
+        self.size = 0
+
+    async def put(self, chat_id, message_id, results, limit=10):
+        """Store the first limit Jackett results shown in a message."""
+        records = tuple(SearchResult.from_jackett(result) for result in results[:limit])
+        self._discard(chat_id, message_id)
+        self.entries[(chat_id, message_id)] = (time.monotonic() + self.ttl, records)
+        self.size += len(records)
+        self._evict()
+
+    async def get(self, chat_id, message_id):
+        """Get the results shown in a message, or None if unknown or expired."""
+        key = (chat_id, message_id)
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        expiry, records = entry
+        if expiry < time.monotonic():
+            self._discard(chat_id, message_id)
+            return None
+        self.entries.move_to_end(key)
+        return records
+
+    async def remove(self, chat_id, message_id):
+        """Forget the results of a message."""
+        self._discard(chat_id, message_id)
+
+    def _discard(self, chat_id, message_id):
+        entry = self.entries.pop((chat_id, message_id), None)
+        if entry is not None:
+            self.size -= len(entry[1])
+
+    async def counts_by_chat(self):
+        """Count the stored records of each chat."""
+        counts = {}
+        for (chat_id, _), (_, records) in self.entries.items():
+            counts[chat_id] = counts.get(chat_id, 0) + len(records)
+        return counts
+
+    def _evict(self):
+        """Drop expired entries, then least recently used ones while over the cap."""
+        now = time.monotonic()
+        for key, (expiry, records) in list(self.entries.items()):
+            if expiry < now:
+                del self.entries[key]
+                self.size -= len(records)
+        while self.size > self.max_results and self.entries:
+            _, (_, records) = self.entries.popitem(last=False)
+            self.size -= len(records)
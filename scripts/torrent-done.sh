@@ -0,0 +1,24 @@
+#!/bin/sh
+# Notify the bot that Transmission finished downloading a torrent.
+#
+# In Transmission's settings.json set:
+#   "script-torrent-done-enabled": true,
+#   "script-torrent-done-filename": "/path/to/torrent-done.sh"
+#
+# Transmission doesn't pass its own environment to the script, so adjust
+# these to match the bot's COMPLETION_LISTENER_* and COMPLETION_TOKEN settings.
+BOT_URL="${BOT_URL:-http://127.0.0.1:9092/torrent-done}"
+BOT_SOCKET="${BOT_SOCKET:-}"
+BOT_TOKEN="${BOT_TOKEN:-}"
+
+if [ -n "$BOT_SOCKET" ]; then
+    BOT_URL="http://localhost/torrent-done"
+fi
+
+curl -fsS -m 5 \
+    ${BOT_SOCKET:+--unix-socket "$BOT_SOCKET"} \
+    -H "X-Token: $BOT_TOKEN" \
+    --data-urlencode "id=$TR_TORRENT_ID" \
+    --data-urlencode "hash=$TR_TORRENT_HASH" \
+    --data-urlencode "name=$TR_TORRENT_NAME" \
+    "$BOT_URL" >/dev/null || true
@@ -0,0 +1,310 @@
+import os
+import json
+import time
+import fcntl
+import asyncio
+import logging
+import sqlite3
+import functools
+from urllib.parse import urlparse
+from concurrent.futures import ThreadPoolExecutor
+from result_store import SearchResult
+from config import SEARCH_RESULTS_TTL, SEARCH_RESULTS_MAX
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS subscriptions (
+    torrent_id INTEGER NOT NULL,
+    chat_id INTEGER NOT NULL,
+    message_id INTEGER NOT NULL,
+    keyboard INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (torrent_id, chat_id)
+);
+CREATE INDEX IF NOT EXISTS subscriptions_chat ON subscriptions (chat_id);
+CREATE TABLE IF NOT EXISTS dashboards (
+    chat_id INTEGER PRIMARY KEY,
+    message_id INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS search_results (
+    chat_id INTEGER NOT NULL,
+    message_id INTEGER NOT NULL,
+    expiry REAL NOT NULL,
+    used REAL NOT NULL,
+    size INTEGER NOT NULL,
+    records TEXT NOT NULL,
+    PRIMARY KEY (chat_id, message_id)
+);
+"""
+
+
+def in_store_thread(func):
+    """Run a method on the store's own thread and await it.
+
+    Another replica holding the write lock then stalls only that thread,
+    never the event loop.
+    """
+
+    @functools.wraps(func)
+    async def wrapper(self, *args, **kwargs):
+        return await asyncio.get_running_loop().run_in_executor(
+            self.executor, functools.partial(func, self, *args, **kwargs)
+        )
+
+    return wrapper
+
+
+class SQLiteSubscriptionRegistry:
+    """SubscriptionRegistry kept in SQLite, so every replica sees the same one."""
+
+    def __init__(self, db, executor):
+        self.db = db
+        self.executor = executor
+
+    @in_store_thread
+    def has_subscriptions(self):
+        """Tell whether any chat follows any torrent."""
+        return (
+            self.db.execute("SELECT 1 FROM subscriptions LIMIT 1").fetchone()
+            is not None
+        )
+
+    @in_store_thread
+    def subscribe(self, torrent_id, chat_id, message_id, keyboard=False):
+        """Follow a torrent in a chat, replacing any earlier message for it.
+
+        keyboard records whether the message has the /info buttons.
+        """
+        with self.db:
+            self.db.execute(
+                "INSERT OR REPLACE INTO subscriptions VALUES (?, ?, ?, ?)",
+                (torrent_id, chat_id, message_id, int(keyboard)),
+            )
+
+    @in_store_thread
+    def unsubscribe(self, torrent_id, chat_id):
+        """Stop following a torrent in a chat and return its message id."""
+        with self.db:
+            row = self.db.execute(
+                "DELETE FROM subscriptions WHERE torrent_id = ? AND chat_id = ? "
+                "RETURNING message_id",
+                (torrent_id, chat_id),
+            ).fetchone()
+        return row[0] if row else None
+
+    @in_store_thread
+    def remove_torrent(self, torrent_id):
+        """Drop every subscription to a torrent and return {chat_id -> message_id}."""
+        with self.db:
+            rows = self.db.execute(
+                "DELETE FROM subscriptions WHERE torrent_id = ? "
+                "RETURNING chat_id, message_id",
+                (torrent_id,),
+            ).fetchall()
+        return dict(rows)
+
+    @in_store_thread
+    def torrent_ids(self):
+        """Get the ids of all followed torrents."""
+        rows = self.db.execute("SELECT DISTINCT torrent_id FROM subscriptions")
+        return [row[0] for row in rows]
+
+    @in_store_thread
+    def chats_for(self, torrent_id):
+        """Get {chat_id -> message_id} for the chats following a torrent."""
+        rows = self.db.execute(
+            "SELECT chat_id, message_id FROM subscriptions WHERE torrent_id = ?",
+            (torrent_id,),
+        )
+        return dict(rows.fetchall())
+
+    @in_store_thread
+    def keyboard_chats(self, torrent_id):
+        """Get the ids of the chats whose message about a torrent has /info buttons."""
+        rows = self.db.execute(
+            "SELECT chat_id FROM subscriptions WHERE torrent_id = ? AND keyboard",
+            (torrent_id,),
+        )
+        return {row[0] for row in rows}
+
+    @in_store_thread
+    def torrents_for(self, chat_id):
+        """Get the ids of the torrents a chat follows."""
+        rows = self.db.execute(
+            "SELECT torrent_id FROM subscriptions WHERE chat_id = ?", (chat_id,)
+        )
+        return {row[0] for row in rows}
+
+    @in_store_thread
+    def set_dashboard(self, chat_id, message_id):
+        """Use message_id as the chat's dashboard."""
+        with self.db:
+            self.db.execute(
+                "INSERT OR REPLACE INTO dashboards VALUES (?, ?)", (chat_id, message_id)
+            )
+
+    @in_store_thread
+    def remove_dashboard(self, chat_id):
+        """Stop using a dashboard in the chat and return its message id, if any."""
+        with self.db:
+            row = self.db.execute(
+                "DELETE FROM dashboards WHERE chat_id = ? RETURNING message_id",
+                (chat_id,),
+            ).fetchone()
+        return row[0] if row else None
+
+    @in_store_thread
+    def dashboards(self):
+        """Get {chat_id -> message_id} of the chats using a dashboard."""
+        return dict(self.db.execute("SELECT chat_id, message_id FROM dashboards"))
+
+
+class SQLiteResultStore:
+    """ResultStore kept in SQLite, so a reply can reach any replica."""
+
+    def __init__(
+        self, db, executor, ttl=SEARCH_RESULTS_TTL, max_results=SEARCH_RESULTS_MAX
+    ):
+        self.db = db
+        self.executor = executor
+        self.ttl = ttl
+        self.max_results = max_results
+
+    @in_store_thread
+    def put(self, chat_id, message_id, results, limit=10):
+        """Store the first limit Jackett results shown in a message."""
+        records = [SearchResult.from_jackett(result) for result in results[:limit]]
+        data = json.dumps(
+            [
+                [record.title, record.size, record.seeders, record.link]
+                for record in records
+            ]
+        )
+        now = time.time()
+        with self.db:
+            self.db.execute(
+                "INSERT OR REPLACE INTO search_results VALUES (?, ?, ?, ?, ?, ?)",
+                (chat_id, message_id, now + self.ttl, now, len(records), data),
+            )
+            self._evict(now)
+
+    @in_store_thread
+    def get(self, chat_id, message_id):
+        """Get the results shown in a message, or None if unknown or expired."""
+        now = time.time()
+        with self.db:
+            row = self.db.execute(
+                "UPDATE search_results SET used = ? "
+                "WHERE chat_id = ? AND message_id = ? AND expiry >= ? "
+                "RETURNING records",
+                (now, chat_id, message_id, now),
+            ).fetchone()
+        if row is None:
+            return None
+        return tuple(SearchResult(*record) for record in json.loads(row[0]))
+
+    @in_store_thread
+    def remove(self, chat_id, message_id):
+        """Forget the results of a message."""
+        with self.db:
+            self.db.execute(
+                "DELETE FROM search_results WHERE chat_id = ? AND message_id = ?",
+                (chat_id, message_id),
+            )
+
+    @in_store_thread
+    def counts_by_chat(self):
+        """Count the stored records of each chat."""
+        return dict(
+            self.db.execute(
+                "SELECT chat_id, SUM(size) FROM search_results GROUP BY chat_id"
+            )
+        )
+
+    def _evict(self, now):
+        """Drop expired entries, then least recently used ones while over the cap."""
+        self.db.execute("DELETE FROM search_results WHERE expiry < ?", (now,))
+        # Keep the most recently used entries whose records fit under the cap
+        self.db.execute(
+            "DELETE FROM search_results WHERE rowid IN ("
+            " SELECT rowid FROM ("
+            "  SELECT rowid, SUM(size) OVER (ORDER BY used DESC) AS total"
+            "  FROM search_results"
+            " ) WHERE total > ?"
+            ")",
+            (self.max_results,),
+        )
+
+
+class FileLockElection:
+    """Leader election through an exclusive lock on a file.
+
+    The leader holds the lock for as long as it runs; the operating system
+    releases it when the process dies, so the next replica to try takes over.
+    Only replicas sharing a filesystem that supports flock can take part.
+    """
+
+    def __init__(self, lock_path):
+        self.lock_path = lock_path
+        self.lock_file = None
+
+    def try_lead(self):
+        """Become the leader if nobody else is, and tell whether we are."""
+        if self.lock_file is not None:
+            return True
+        lock_file = open(self.lock_path, "a")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock_file.close()
+            return False
+        self.lock_file = lock_file
+        return True
+
+    def resign(self):
+        """Give up leadership."""
+        if self.lock_file is not None:
+            fcntl.flock(self.lock_file, fcntl.LOCK_UN)
+            self.lock_file.close()
+            self.lock_file = None
+
+
+class SQLiteStore:
+    """State shared by replicas on one host, in a SQLite database next to its lock file."""
+
+    def __init__(self, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        # Opened here, then only used from the store thread
+        self.db = sqlite3.connect(path, timeout=5, check_same_thread=False)
+        # WAL lets replicas read while another one writes
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript(SCHEMA)
+        # Stores created before subscriptions recorded keyboards lack the column
+        columns = {
+            row[1] for row in self.db.execute("PRAGMA table_info(subscriptions)")
+        }
+        if "keyboard" not in columns:
+            self.db.execute(
+                "ALTER TABLE subscriptions ADD COLUMN keyboard INTEGER NOT NULL DEFAULT 0"
+            )
+        self.executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="shared-store"
+        )
+        self.registry = SQLiteSubscriptionRegistry(self.db, self.executor)
+        self.results = SQLiteResultStore(self.db, self.executor)
+        self.election = FileLockElection(f"{path}.leader.lock")
+        logger.info("Sharing bot state through %s", path)
+
+
+# Shared store backends by URL scheme
+STORE_BACKENDS = {
+    "sqlite": lambda url: SQLiteStore(url.path),
+}
+
+
+def open_shared_store(store_url):
+    """Open the shared store named by a URL such as sqlite:////data/bot.sqlite3."""
+    url = urlparse(store_url)
+    if url.scheme not in STORE_BACKENDS:
+        raise ValueError(f"Unsupported SHARED_STORE scheme: {url.scheme}")
+    return STORE_BACKENDS[url.scheme](url)
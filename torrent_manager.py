@@ -1,6 +1,10 @@
 import time
 import aiohttp
 import asyncio
+import logging
+import contextvars
+from collections import OrderedDict
+from contextlib import contextmanager
 from functools import wraps
 from concurrent.futures import ThreadPoolExecutor
 from transmission_rpc import Client, TransmissionError
@@ -12,19 +16,87 @@ from config import (
     TRANSMISSION_USERNAME,
     TRANSMISSION_PASSWORD,
     TRANSMISSION_PROTOCOL,
+    RPC_INTERACTIVE_WORKERS,
+    RPC_MONITOR_WORKERS,
+    RPC_BULK_WORKERS,
 )
 
-# Thread pool for executing blocking operations
-executor = ThreadPoolExecutor(max_workers=10)
+logger = logging.getLogger(__name__)
+
+# RPC priority classes
+PRIORITY_INTERACTIVE = "interactive"  # User commands
+PRIORITY_MONITOR = "monitor"  # Background progress polling
+PRIORITY_BULK = "bulk"  # Library-wide maintenance
+
+# Priority of the RPCs issued by the current task
+rpc_priority = contextvars.ContextVar("rpc_priority", default=PRIORITY_INTERACTIVE)
+
+# One thread pool per priority class, so background polling can never occupy
+# the threads that user commands run on
+executors = {
+    PRIORITY_INTERACTIVE: ThreadPoolExecutor(
+        max_workers=RPC_INTERACTIVE_WORKERS, thread_name_prefix="rpc-interactive"
+    ),
+    PRIORITY_MONITOR: ThreadPoolExecutor(
+        max_workers=RPC_MONITOR_WORKERS, thread_name_prefix="rpc-monitor"
+    ),
+    PRIORITY_BULK: ThreadPoolExecutor(
+        max_workers=RPC_BULK_WORKERS, thread_name_prefix="rpc-bulk"
+    ),
+}
+
+# How long get_torrent waits to merge calls for other ids into one RPC
+GET_TORRENT_BATCH_WINDOW = 0.005
+
+# How long mutations wait to be sent together with same-kind ones in one RPC
+MUTATION_BATCH_WINDOW = 0.02
+
+# Completed torrents whose file lists are kept
+COMPLETED_FILES_CACHE_SIZE = 256
+
+# Fields a file list needs
+FILE_FIELDS = ["name", "hashString", "files", "percentDone"]
+
+
+def _retrieve_exception(future):
+    """Mark a shared future's exception as retrieved, even if nobody awaited it."""
+    if not future.cancelled():
+        future.exception()
+
+
+@contextmanager
+def priority(level):
+    """Issue the RPCs made inside the block with the given priority class."""
+    token = rpc_priority.set(level)
+    try:
+        yield
+    finally:
+        rpc_priority.reset(token)
+
+
+def with_priority(level):
+    """Decorator to run a coroutine function's RPCs with the given priority class."""
+
+    def decorator(func):
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            with priority(level):
+                return await func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
 
 
 def run_in_executor(func):
-    """Decorator to run a synchronous function in a thread pool executor."""
+    """Decorator to run a synchronous function in the thread pool of the current priority."""
 
     @wraps(func)
     async def wrapper(*args, **kwargs):
         loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(executor, lambda: func(*args, **kwargs))
+        return await loop.run_in_executor(
+            executors[rpc_priority.get()], lambda: func(*args, **kwargs)
+        )
 
     return wrapper
 
@@ -35,6 +107,20 @@ class TorrentManager:
     def __init__(self):
         self.client = None
         self.lock = asyncio.Lock()
+        self.hash_index = None  # Maps infohash -> torrent_id, loaded on first use
+        self.inflight_reads = {}  # Maps read key -> task shared by concurrent callers
+        # Maps priority -> {torrent_id -> future} for the batches being collected
+        self.pending_gets = {}
+        # Maps (priority, sync function, arguments) -> {torrent_id -> future}, in
+        # the order the batches were opened
+        self.pending_mutations = {}
+        # Mutation batches are sent one at a time, in the order they were opened
+        self.mutation_lock = asyncio.Lock()
+        # Flush tasks, referenced until done so they can't be garbage collected
+        self.flush_tasks = set()
+        # Maps infohash -> (name, files) of completed torrents, least recently used
+        # first; unlike torrent ids, infohashes stay valid across daemon restarts
+        self.completed_files = OrderedDict()
 
     async def ensure_connected(self):
         """Ensure connection to Transmission client exists."""
@@ -49,12 +135,13 @@ class TorrentManager:
             try:
                 # This is synchronous, running it in a thread
                 client = await self._create_client()
-                print("Connected to Transmission")
+                logger.info("Connected to Transmission")
                 return client
             except TransmissionError as e:
                 if attempt < MAX_RETRIES - 1:
-                    print(
-                        f"Failed to connect to Transmission daemon. Retrying in {RETRY_DELAY} seconds..."
+                    logger.warning(
+                        "Failed to connect to Transmission daemon. Retrying in %s seconds...",
+                        RETRY_DELAY,
                     )
                     await asyncio.sleep(RETRY_DELAY)
                 else:
@@ -71,13 +158,77 @@ class TorrentManager:
             protocol=TRANSMISSION_PROTOCOL,
         )
 
+    async def load_hash_index(self):
+        """Build the infohash index from a projected fetch of the library."""
+        client = await self.ensure_connected()
+        with priority(PRIORITY_BULK):
+            torrents = await self._get_torrent_hashes_sync(client)
+        self.hash_index = {
+            torrent.hash_string.lower(): torrent.id for torrent in torrents
+        }
+        return self.hash_index
+
+    @run_in_executor
+    def _get_torrent_hashes_sync(self, client):
+        """Get ids and hashes of all torrents synchronously (runs in thread pool)."""
+        return client.get_torrents(arguments=["id", "hashString"])
+
+    async def find_torrent(self, infohash):
+        """Get the torrent with an infohash, or None if Transmission doesn't have it.
+
+        Torrent ids only last for one daemon session, and torrents can be added
+        or removed outside the bot, so an index hit is checked against the
+        torrent's hash, and a miss or stale hit asks Transmission about that
+        one hash.
+        """
+        infohash = infohash.lower()
+        if self.hash_index is None:
+            await self._coalesce(("load_hash_index",), self.load_hash_index)
+        torrent_id = self.hash_index.get(infohash)
+        if torrent_id is not None:
+            try:
+                torrent = await self.get_torrent(torrent_id)
+            except KeyError:
+                torrent = None
+            if torrent is not None and torrent.hash_string.lower() == infohash:
+                return torrent
+            self.hash_index.pop(infohash, None)
+
+        # Transmission accepts hashes as ids
+        torrents = await self._coalesce(
+            ("find_torrent", infohash),
+            self.get_torrent_fields,
+            [infohash],
+            ["hashString"],
+        )
+        if not torrents:
+            return None
+        self.hash_index[infohash] = torrents[0].id
+        return await self.get_torrent(torrents[0].id)
+
+    async def find_torrent_id(self, infohash):
+        """Look up a torrent id by infohash, checked against Transmission."""
+        torrent = await self.find_torrent(infohash)
+        return torrent.id if torrent is not None else None
+
+    def forget_torrent(self, torrent_id):
+        """Drop a torrent from the infohash index."""
+        if self.hash_index is None:
+            return
+        for infohash, indexed_id in list(self.hash_index.items()):
+            if indexed_id == torrent_id:
+                del self.hash_index[infohash]
+
     async def add_torrent(self, torrent_link):
         """Add a torrent to Transmission."""
         try:
             client = await self.ensure_connected()
-            return await self._add_torrent_sync(client, torrent_link)
+            torrent = await self._add_torrent_sync(client, torrent_link)
+            if self.hash_index is not None and torrent.hash_string:
+                self.hash_index[torrent.hash_string.lower()] = torrent.id
+            return torrent
         except Exception as e:
-            print(f"Error adding torrent: {e}")
+            logger.error("Error adding torrent: %s", e)
             raise
 
     @run_in_executor
@@ -85,30 +236,136 @@ class TorrentManager:
         """Add torrent synchronously (runs in thread pool)."""
         return client.add_torrent(torrent_link)
 
+    async def _coalesce(self, key, func, *args):
+        """Run a read once for all concurrent callers asking for the same key."""
+        # Callers of different priorities don't share, so nobody waits in a slower lane
+        key = (rpc_priority.get(),) + key
+        task = self.inflight_reads.get(key)
+        if task is None:
+            task = asyncio.ensure_future(func(*args))
+            self.inflight_reads[key] = task
+            task.add_done_callback(lambda t: self._forget_read(key, t))
+        # Shield the shared read so one cancelled caller doesn't cancel it for all
+        return await asyncio.shield(task)
+
+    def _spawn(self, coro):
+        """Run a coroutine as a task that stays referenced until it finishes."""
+        task = asyncio.ensure_future(coro)
+        self.flush_tasks.add(task)
+        task.add_done_callback(self.flush_tasks.discard)
+        return task
+
+    def _forget_read(self, key, task):
+        """Drop a finished read from the in-flight table."""
+        if self.inflight_reads.get(key) is task:
+            del self.inflight_reads[key]
+        _retrieve_exception(task)
+
     async def get_torrent(self, torrent_id):
-        """Get a torrent by ID."""
-        client = await self.ensure_connected()
-        return await self._get_torrent_sync(client, torrent_id)
+        """Get a torrent by ID.
+
+        Calls made within a few milliseconds of each other are merged into a
+        single multi-id torrent-get.
+        """
+        loop = asyncio.get_running_loop()
+        level = rpc_priority.get()
+        if level not in self.pending_gets:
+            self.pending_gets[level] = {}
+            # The flush callback runs in a copy of this context, so with this priority
+            loop.call_later(
+                GET_TORRENT_BATCH_WINDOW,
+                lambda: self._spawn(self._flush_pending_gets(level)),
+            )
+        batch = self.pending_gets[level]
+        future = batch.get(torrent_id)
+        if future is None:
+            future = loop.create_future()
+            future.add_done_callback(_retrieve_exception)
+            batch[torrent_id] = future
+        return await asyncio.shield(future)
+
+    async def _flush_pending_gets(self, level):
+        """Fetch every torrent requested during the batch window in one RPC."""
+        pending = self.pending_gets.pop(level)
+        try:
+            client = await self.ensure_connected()
+            torrents = await self._get_torrents_sync(client, list(pending))
+        except Exception as e:
+            for future in pending.values():
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        torrents_by_id = {torrent.id: torrent for torrent in torrents}
+        for torrent_id, future in pending.items():
+            if future.done():
+                continue
+            if torrent_id in torrents_by_id:
+                future.set_result(torrents_by_id[torrent_id])
+            else:
+                future.set_exception(KeyError("Torrent not found in result"))
 
     @run_in_executor
-    def _get_torrent_sync(self, client, torrent_id):
-        """Get torrent synchronously (runs in thread pool)."""
-        return client.get_torrent(torrent_id)
+    def _get_torrents_sync(self, client, torrent_ids):
+        """Get several torrents synchronously (runs in thread pool)."""
+        return client.get_torrents(ids=torrent_ids)
 
     async def get_all_torrents(self):
         """Get all torrents."""
         client = await self.ensure_connected()
-        return await self._get_all_torrents_sync(client)
+        return await self._coalesce(
+            ("get_all_torrents",), self._get_all_torrents_sync, client
+        )
 
     @run_in_executor
     def _get_all_torrents_sync(self, client):
         """Get all torrents synchronously (runs in thread pool)."""
         return client.get_torrents()
 
+    async def get_torrent_fields(self, torrent_ids, fields):
+        """Get only the given fields of several torrents in one RPC."""
+        client = await self.ensure_connected()
+        return await self._get_torrent_fields_sync(client, torrent_ids, fields)
+
+    @run_in_executor
+    def _get_torrent_fields_sync(self, client, torrent_ids, fields):
+        """Get projected torrent fields synchronously (runs in thread pool)."""
+        return client.get_torrents(ids=torrent_ids, arguments=["id", *fields])
+
+    async def get_files(self, torrent_id):
+        """Get a torrent's name and files as (name, size, bytes completed) tuples.
+
+        The file list of a completed torrent can't change, so it is cached by
+        infohash; a cheap fetch of the hash tells which entry the id means now.
+        """
+        torrents = await self.get_torrent_fields([torrent_id], ["hashString"])
+        if not torrents:
+            raise KeyError("Torrent not found in result")
+        infohash = torrents[0].hash_string.lower()
+        if infohash in self.completed_files:
+            self.completed_files.move_to_end(infohash)
+            return self.completed_files[infohash]
+
+        torrents = await self.get_torrent_fields([torrent_id], FILE_FIELDS)
+        if not torrents:
+            raise KeyError("Torrent not found in result")
+        torrent = torrents[0]
+        infohash = torrent.hash_string.lower()
+        files = [
+            (file["name"], file["length"], file["bytesCompleted"])
+            for file in torrent.fields["files"]
+        ]
+        if torrent.percent_done >= 1:
+            self.completed_files[infohash] = (torrent.name, files)
+            if len(self.completed_files) > COMPLETED_FILES_CACHE_SIZE:
+                self.completed_files.popitem(last=False)
+        return torrent.name, files
+
     async def remove_torrent(self, torrent_id, delete_data=True):
         """Remove a torrent."""
         client = await self.ensure_connected()
         await self._remove_torrent_sync(client, torrent_id, delete_data)
+        self.forget_torrent(torrent_id)
 
     @run_in_executor
     def _remove_torrent_sync(self, client, torrent_id, delete_data):
@@ -117,38 +374,117 @@ class TorrentManager:
 
     async def start_torrent(self, torrent_id):
         """Start a torrent."""
-        client = await self.ensure_connected()
-        await self._start_torrent_sync(client, torrent_id)
+        await self._batch_mutation(self._start_torrents_sync, torrent_id)
 
     @run_in_executor
-    def _start_torrent_sync(self, client, torrent_id):
-        """Start torrent synchronously (runs in thread pool)."""
-        client.start_torrent(ids=torrent_id)
+    def _start_torrents_sync(self, client, torrent_ids):
+        """Start torrents synchronously (runs in thread pool)."""
+        client.start_torrent(ids=torrent_ids)
 
     async def stop_torrent(self, torrent_id):
         """Stop a torrent."""
-        client = await self.ensure_connected()
-        await self._stop_torrent_sync(client, torrent_id)
+        await self._batch_mutation(self._stop_torrents_sync, torrent_id)
 
     @run_in_executor
-    def _stop_torrent_sync(self, client, torrent_id):
-        """Stop torrent synchronously (runs in thread pool)."""
-        client.stop_torrent(ids=torrent_id)
+    def _stop_torrents_sync(self, client, torrent_ids):
+        """Stop torrents synchronously (runs in thread pool)."""
+        client.stop_torrent(ids=torrent_ids)
 
     async def move_torrent_data(self, torrent_id, target_directory):
         """Move torrent data to a new directory."""
-        client = await self.ensure_connected()
-        await self._move_torrent_data_sync(client, torrent_id, target_directory)
+        await self._batch_mutation(
+            self._move_torrents_data_sync, torrent_id, target_directory
+        )
 
     @run_in_executor
-    def _move_torrent_data_sync(self, client, torrent_id, target_directory):
+    def _move_torrents_data_sync(self, client, torrent_ids, target_directory):
         """Move torrent data synchronously (runs in thread pool)."""
-        client.move_torrent_data(torrent_id, target_directory)
+        client.move_torrent_data(torrent_ids, target_directory)
+
+    async def _batch_mutation(self, func, torrent_id, *args):
+        """Run a mutation as part of one RPC for every same-kind call in the window.
+
+        Calls with the same func, arguments and priority within
+        MUTATION_BATCH_WINDOW are sent together with a list of ids; each caller
+        still gets its own outcome. Batches are sent in the order they were
+        opened, and a call never joins a batch that would overtake a later call
+        for the same torrent, so e.g. a stop then a start arrive in that order.
+        """
+        loop = asyncio.get_running_loop()
+        key = (rpc_priority.get(), func, args)
+        batch = self.pending_mutations.get(key)
+        if batch is None or self._queued_after(key, torrent_id):
+            batch = {}
+            # Reinsert so the dict stays in the order batches were opened
+            self.pending_mutations.pop(key, None)
+            self.pending_mutations[key] = batch
+            # The flush callback runs in a copy of this context, so with this priority
+            loop.call_later(
+                MUTATION_BATCH_WINDOW,
+                lambda: self._spawn(self._flush_mutations(key, batch)),
+            )
+        future = batch.get(torrent_id)
+        if future is None:
+            future = loop.create_future()
+            future.add_done_callback(_retrieve_exception)
+            batch[torrent_id] = future
+        return await asyncio.shield(future)
+
+    def _queued_after(self, key, torrent_id):
+        """Check whether a batch opened after key's has a call for torrent_id."""
+        later = False
+        for other_key, batch in self.pending_mutations.items():
+            if later and torrent_id in batch:
+                return True
+            later = later or other_key == key
+        return False
+
+    async def _flush_mutations(self, key, pending):
+        """Send the mutations collected during the batch window as one RPC."""
+        if self.pending_mutations.get(key) is pending:
+            del self.pending_mutations[key]
+        async with self.mutation_lock:
+            await self._send_mutations(key, pending)
+
+    async def _send_mutations(self, key, pending):
+        """Send one batch of mutations and settle each caller's future."""
+        _, func, args = key
+        torrent_ids = list(pending)
+        try:
+            client = await self.ensure_connected()
+        except Exception as e:
+            client = None
+            outcomes = [e] * len(torrent_ids)
+
+        try:
+            if client is not None:
+                await func(client, torrent_ids, *args)
+                outcomes = [None] * len(torrent_ids)
+        except Exception as e:
+            if len(torrent_ids) == 1:
+                outcomes = [e]
+            else:
+                # Retry one by one so only the callers whose torrent failed see an error
+                outcomes = await asyncio.gather(
+                    *(func(client, [torrent_id], *args) for torrent_id in torrent_ids),
+                    return_exceptions=True,
+                )
+
+        for torrent_id, outcome in zip(torrent_ids, outcomes):
+            future = pending[torrent_id]
+            if future.done():
+                continue
+            if isinstance(outcome, Exception):
+                future.set_exception(outcome)
+            else:
+                future.set_result(None)
 
     async def get_free_space(self, directory):
         """Get free space in a directory."""
         client = await self.ensure_connected()
-        return await self._get_free_space_sync(client, directory)
+        return await self._coalesce(
+            ("get_free_space", directory), self._get_free_space_sync, client, directory
+        )
 
     @run_in_executor
     def _get_free_space_sync(self, client, directory):
@@ -158,10 +494,9 @@ class TorrentManager:
     # force start torrent
     async def force_start_torrent(self, torrent_id):
         """Force start a torrent."""
-        client = await self.ensure_connected()
-        await self._force_start_torrent_sync(client, torrent_id)
+        await self._batch_mutation(self._force_start_torrents_sync, torrent_id)
 
     @run_in_executor
-    def _force_start_torrent_sync(self, client, torrent_id):
-        """Force start torrent synchronously (runs in thread pool)."""
-        client.start_torrent(ids=torrent_id, bypass_queue=True)
+    def _force_start_torrents_sync(self, client, torrent_ids):
+        """Force start torrents synchronously (runs in thread pool)."""
+        client.start_torrent(ids=torrent_ids, bypass_queue=True)